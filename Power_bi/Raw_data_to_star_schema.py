@@ -1,6 +1,12 @@
 import os
+import re
 import glob
+from functools import lru_cache
+import numpy as np
 import pandas as pd
+from columnar_io import read_holdings, iter_holdings, write_star_schema
+from warehouse import WAREHOUSE_FORMATS, connect, load_star_schema
+from ownership_index import build_ownership_index
 
 
 
@@ -67,79 +73,177 @@ def classify_via_dict(class_str: str, issuer_name: str = ""):
     return "Other", "", False
 
 
+# Compiled version of classify_via_dict for whole columns (same results, see benchmarks.py)
+# One regex per bucket: "does any keyword of the bucket occur in Class" is a single search,
+# the buckets are still checked in the priority order Derivative -> Debt -> Fund -> Equity.
+BUCKET_ORDER = ["Derivative", "Debt", "Fund", "Equity"]
+
+
+def _any_keyword(keywords):
+    return re.compile("|".join(re.escape(k) for k in keywords))
+
+
+_BUCKET_PATTERNS = [(bucket, _any_keyword(CLASS_MAP[bucket])) for bucket in BUCKET_ORDER]
+_PREFERRED_PATTERN = _any_keyword(["PFD", "PREF", "PREFERRED"])
+_INVERSE_CLASS_PATTERN = _any_keyword(INVERSE_HINTS_CLASS)
+_SHORT_CLASS_PATTERN = _any_keyword(["SHORT", "BEAR", "INVERSE"])
+_INVERSE_ISSUER_PATTERN = _any_keyword(INVERSE_HINTS_ISSUER)
+
+
+@lru_cache(maxsize=None)
+def classify_class_string(c: str):
+    """
+    Memoized classification of one normalized Class string.
+    Returns (SecurityType, SecuritySubtype, inverse hint in class, short/bear/inverse in class);
+    the issuer name only matters for funds and is checked separately.
+    """
+    for bucket, pattern in _BUCKET_PATTERNS:
+        if pattern.search(c):
+            if bucket == "Equity":
+                subtype = "Preferred" if _PREFERRED_PATTERN.search(c) else "Common/Ordinary"
+                return "Equity", subtype, False, False
+            if bucket == "Fund":
+                return "Fund", "Standard", bool(_INVERSE_CLASS_PATTERN.search(c)), bool(_SHORT_CLASS_PATTERN.search(c))
+            subtype = "Option/Warrant/Right" if bucket == "Derivative" else "Note/Bond"
+            return bucket, subtype, False, False
+    return "Other", "", False, False
+
+
+def classify_frame(class_col: pd.Series, issuer_col: pd.Series) -> pd.DataFrame:
+    """
+    Vectorized classify_via_dict over whole columns.
+    - every distinct Class string is normalized and classified once (memoized), then mapped back by code
+    - issuer hints are only searched for fund rows where they can change the result
+    Returns Class_Normalized, SecurityType, SecuritySubtype, IsInverseLeveraged (index of class_col).
+    """
+    codes, uniques = pd.factorize(class_col, use_na_sentinel=True)
+    norm_uniques = [_norm(u) for u in uniques] + [""]  # last slot for missing Class (code -1)
+    results = [classify_class_string(c) for c in norm_uniques]
+    codes = np.where(codes < 0, len(norm_uniques) - 1, codes)
+
+    normalized = np.array(norm_uniques, dtype=object)[codes]
+    security_type = np.array([r[0] for r in results], dtype=object)[codes]
+    subtype = np.array([r[1] for r in results], dtype=object)[codes]
+    inverse_class = np.array([r[2] for r in results], dtype=bool)[codes]
+    short_class = np.array([r[3] for r in results], dtype=bool)[codes]
+
+    is_fund = security_type == "Fund"
+    is_inverse = is_fund & inverse_class
+    # Issuer based rule: fund + known inverse issuer + short/bear/inverse in class
+    check_issuer = is_fund & ~is_inverse & short_class
+    if check_issuer.any():
+        issuers = issuer_col[check_issuer].map(_norm)
+        is_inverse[check_issuer] = issuers.str.contains(_INVERSE_ISSUER_PATTERN.pattern, regex=True).to_numpy(dtype=bool)
+    subtype = np.where(is_inverse, "Inverse/Leveraged", subtype)
+
+    return pd.DataFrame(
+        {
+            "Class_Normalized": normalized,
+            "SecurityType": security_type,
+            "SecuritySubtype": subtype,
+            "IsInverseLeveraged": is_inverse,
+        },
+        index=class_col.index,
+    )
 
 
 
 
-def transform_starschema(input_glob: str, output_folder: str, write_csv: bool = True):
-    #  1) Load all matching CSVs and tag FirmName
-    # Replace backslashes for glob compatibility, collect and sort file list.
-    files = sorted(glob.glob(input_glob.replace("\\", "/")))
-    if not files:
-        # Fail early with a clear message if the pattern returns nothing.
-        raise FileNotFoundError(f"No CSVs matched pattern: {input_glob}")
 
+
+def load_firm_files(files):
+    """Read the per-firm holdings files (CSV or Parquet) and tag every row with FirmName."""
     frames = []
     for f in files:
-        # Read each CSV and copy to avoid chained assignment issues downstream.
-        df = pd.read_csv(f)
+        # Read each file (Parquet keeps the dtypes) and copy to avoid chained assignment issues downstream.
+        df = read_holdings(f)
         df = df.copy()
         # Derive FirmName from the filename (without extension) and tag each row.
         firm_name = os.path.splitext(os.path.basename(f))[0]
         df["FirmName"] = firm_name
         frames.append(df)
     # Concatenate all firm DataFrames vertically
-    df_all = pd.concat(frames, ignore_index=True)
+    return pd.concat(frames, ignore_index=True)
 
-    # 2) Parse timestamps and derive QuarterEndDate + attributes (kept)
-    df_all["report_dates"] = pd.to_datetime(
-        df_all["report_dates"].astype(str).str.strip(), errors="coerce"
-    )
-    df_all = df_all.copy()
-    # Convert to quarterly periods for consistent quarter-based snapshots.
-    q = df_all["report_dates"].dt.to_period("Q")
 
-    # Year/Quarter/YearQuarter are derived from the period object.
-    df_all["Year"] = q.dt.year
-    df_all["Quarter"] = q.dt.quarter
-    df_all["YearQuarter"] = q.astype(str)  # e.g. "2024Q1"
+# First quarter of the calendar dimension (electronic 13F filings on EDGAR start in 1999)
+CALENDAR_START = "1999Q1"
+
 
-    # Quarter end as a plain date (unchanged intent)
-    df_all["QuarterEndDate"] = q.dt.end_time.dt.date
+def _quarter_end_keys(periods):
+    # DateKey YYYYMMDD of the quarter end, integer arithmetic instead of strftime per row
+    ends = periods.end_time
+    return periods.year * 10000 + ends.month * 100 + ends.day
 
-    # 2b) Add DateKey (YYYYMMDD) for a proper Dim_Date join
-    # Use quarter end date as the snapshot date
-    quarter_end_ts = q.dt.end_time  # pandas Timestamp
-    df_all["DateKey"] = quarter_end_ts.dt.strftime("%Y%m%d").astype(int)
 
-    # 3) Aggregate to Firm × Security × Quarter
+def build_calendar(first_quarter=CALENDAR_START, last_quarter=None):
+    """
+    Gap-free quarter calendar (DateKey, Date, Year, Quarter, YearQuarter) from first_quarter
+    up to last_quarter (default: current quarter). Only a few hundred rows, built once per run.
+    """
+    last = pd.Period(last_quarter, freq="Q") if last_quarter is not None else pd.Timestamp.today().to_period("Q")
+    periods = pd.period_range(pd.Period(first_quarter, freq="Q"), last, freq="Q")
+    return pd.DataFrame({
+        "DateKey": np.asarray(_quarter_end_keys(periods), dtype=np.int64),
+        "Date": periods.end_time.date,
+        "Year": periods.year,
+        "Quarter": periods.quarter,
+        "YearQuarter": periods.strftime("%YQ%q"),  # e.g. "2024Q1"
+    })
+
+
+def add_date_key(df_all):
+    """
+    Parse report_dates and attach the quarter-end DateKey (YYYYMMDD).
+    Only the distinct report dates (a few hundred) are parsed and converted to quarters,
+    the keys are joined back to the rows through their factorize codes.
+    Year/Quarter/YearQuarter/Date live in the calendar dimension (build_calendar).
+    """
+    codes, uniques = pd.factorize(df_all["report_dates"], use_na_sentinel=True)
+    parsed = pd.to_datetime(pd.Series(uniques, dtype=object).astype(str).str.strip(), errors="coerce")
+    # Convert to quarterly periods for consistent quarter-based snapshots (quarter end = snapshot date)
+    keys = _quarter_end_keys(pd.PeriodIndex(parsed.dt.to_period("Q")))
+    keys = pd.array(keys, dtype="Int64")  # missing/invalid dates stay missing
+    # Code -1 (missing report_dates) points to an extra NA slot at the end
+    parsed_all = pd.concat([parsed, pd.Series([pd.NaT])], ignore_index=True)
+    keys_all = pd.array(list(keys) + [pd.NA], dtype="Int64")
+
+    df_all["report_dates"] = parsed_all.take(codes).to_numpy()
+    date_key = keys_all.take(codes)
+    df_all["DateKey"] = date_key.to_numpy(dtype=np.int64) if not date_key.isna().any() else date_key
+    return df_all
+
+
+def aggregate_holdings(df_all):
+    """Firm × Security × Quarter sums of Shares and Value."""
     # Drop Company/Class from grouping to avoid splitting the same CUSIP by text drift
     group_cols = ["FirmName", "CUSIP", "DateKey"]
-    agg = (
+    return (
         df_all.groupby(group_cols, dropna=False)
         .agg(Shares=("Shares", "sum"), Value=("Value", "sum"))
         .reset_index()
     )
 
-    # 4) Build dimensions (Security, Date, Firm)
-    # Dim_Security: use latest attributes per CUSIP from source rows
-    sec_attrs = (
-        df_all.sort_values("report_dates")
-        .drop_duplicates(subset=["CUSIP"], keep="last")[["CUSIP", "Company", "Class"]]
+
+def latest_security_attrs(df_all):
+    """Latest Company/Class per CUSIP (by report_dates) from the source rows."""
+    return (
+        df_all.sort_values("report_dates", kind="stable")
+        .drop_duplicates(subset=["CUSIP"], keep="last")[["CUSIP", "Company", "Class", "report_dates"]]
     )
 
+
+def build_dim_security(sec_attrs):
+    """Classify the security attributes and shape them into Dim_Security."""
     # 4a) Dictionary mapping to Equity / Derivative / Debt (+ Fund/Other)
-    sec_attrs["Class_Normalized"] = sec_attrs["Class"].apply(_norm)
-    # Apply classifier row-wise, returning a 3-tuple: (SecurityType, SecuritySubtype, IsInverseLeveraged)
-    mapped = sec_attrs.apply(
-        lambda r: classify_via_dict(r["Class"], r["Company"]), axis=1, result_type="expand"
-    )
-    mapped.columns = ["SecurityType", "SecuritySubtype", "IsInverseLeveraged"]
+    # Compiled classifier on the distinct Class strings (same results as classify_via_dict row by row):
+    # Class_Normalized, SecurityType, SecuritySubtype, IsInverseLeveraged
+    mapped = classify_frame(sec_attrs["Class"], sec_attrs["Company"])
     # Attach the mapped columns to the security attributes.
     sec_attrs = pd.concat([sec_attrs, mapped], axis=1)
 
     # Build Dim_Security with explicit columns and add a convenience IsEquity flag.
-    dim_security = (
+    return (
         sec_attrs.rename(
             columns={
                 "CUSIP": "SecurityKey",
@@ -160,14 +264,247 @@ def transform_starschema(input_glob: str, output_folder: str, write_csv: bool =
         .reset_index(drop=True)
     )
 
-    # Dim_Date: quarter-end members with attributes
-    dim_date = (
-        df_all[["DateKey", "QuarterEndDate", "Year", "Quarter", "YearQuarter"]]
-        .drop_duplicates()
-        .sort_values("QuarterEndDate")
-        .rename(columns={"QuarterEndDate": "Date"})
-        .reset_index(drop=True)
+
+def build_dim_date(date_keys):
+    """
+    Dim_Date: complete quarter calendar covering the whole 13F history and every DateKey in the data
+    (no gaps, so Power BI time intelligence works on quarters without holdings as well).
+    """
+    date_keys = pd.Series(date_keys).dropna()
+    first = min(pd.Period(CALENDAR_START, freq="Q"),
+                pd.Period(pd.to_datetime(str(int(date_keys.min())), format="%Y%m%d"), freq="Q")) \
+        if len(date_keys) else pd.Period(CALENDAR_START, freq="Q")
+    last = pd.Timestamp.today().to_period("Q")
+    if len(date_keys):
+        last = max(last, pd.Period(pd.to_datetime(str(int(date_keys.max())), format="%Y%m%d"), freq="Q"))
+    return build_calendar(first, last)
+
+
+POSITION_CHANGE_COLUMNS = [
+    "FirmKey", "SecurityKey", "DateKey", "DeltaShares", "DeltaValue",
+    "IsNew", "IsClosed", "IsIncreased", "IsDecreased",
+]
+
+
+def firm_quarters(fact):
+    """Quarters each firm filed (FirmKey, DateKey) with the firm's previous/next filed quarter."""
+    fq = fact[["FirmKey", "DateKey"]].drop_duplicates().sort_values(["FirmKey", "DateKey"])
+    by_firm = fq.groupby("FirmKey", sort=False)["DateKey"]
+    fq["PrevDateKey"] = by_firm.shift(1)
+    fq["NextDateKey"] = by_firm.shift(-1)
+    return fq.reset_index(drop=True)
+
+
+def build_position_change(fact, since=None):
+    """
+    Fact_PositionChange: quarter-over-quarter change per FirmKey × SecurityKey against the firm's
+    previous filed quarter (one sorted lag over DateKey, no per-firm loops).
+        - held before and now: DeltaShares/DeltaValue, IsIncreased/IsDecreased
+        - not held in the previous filed quarter: IsNew (delta = full position)
+        - held before but missing now: IsClosed row in the quarter of the exit (delta = -position)
+    The first filed quarter of a firm has no baseline and therefore no change rows.
+    since: optional Series FirmKey -> DateKey; only these firms and only change rows from that
+    DateKey on are computed (input rows start at the filed quarter before it).
+    """
+    fact = fact[["FirmKey", "SecurityKey", "DateKey", "Shares", "Value"]]
+    if since is not None:
+        fact = fact[fact["FirmKey"].isin(since.index)]
+        fq = firm_quarters(fact)
+        start = fq["DateKey"].where(fq["DateKey"] < fq["FirmKey"].map(since))
+        start = start.groupby(fq["FirmKey"]).max()  # last filed quarter before `since` (baseline)
+        start = start.reindex(since.index).fillna(since)
+        fact = fact[fact["DateKey"] >= fact["FirmKey"].map(start)]
+    if fact.empty:
+        return pd.DataFrame(columns=POSITION_CHANGE_COLUMNS)
+
+    s = (
+        fact.sort_values(["FirmKey", "SecurityKey", "DateKey"], kind="stable")
+        .merge(firm_quarters(fact), on=["FirmKey", "DateKey"], how="left")
     )
+    same_prev = s["FirmKey"].eq(s["FirmKey"].shift(1)) & s["SecurityKey"].eq(s["SecurityKey"].shift(1))
+    same_next = s["FirmKey"].eq(s["FirmKey"].shift(-1)) & s["SecurityKey"].eq(s["SecurityKey"].shift(-1))
+    # Lag/lead only count if they are the firm's adjacent filed quarter (else the position was closed in between)
+    held_before = same_prev & s["DateKey"].shift(1).eq(s["PrevDateKey"])
+    held_after = same_next & s["DateKey"].shift(-1).eq(s["NextDateKey"])
+
+    # Rows of quarters with a baseline: new, increased, decreased or unchanged positions
+    current = s[s["PrevDateKey"].notna()]
+    held = held_before[current.index]
+    # fill_value keeps the integer dtype of the measures
+    delta_shares = current["Shares"] - s["Shares"].shift(1, fill_value=0)[current.index].where(held, 0)
+    delta_value = current["Value"] - s["Value"].shift(1, fill_value=0)[current.index].where(held, 0)
+    changes = pd.DataFrame({
+        "FirmKey": current["FirmKey"],
+        "SecurityKey": current["SecurityKey"],
+        "DateKey": current["DateKey"],
+        "DeltaShares": delta_shares,
+        "DeltaValue": delta_value,
+        "IsNew": ~held,
+        "IsClosed": False,
+        "IsIncreased": held & delta_shares.gt(0).fillna(False),
+        "IsDecreased": held & delta_shares.lt(0).fillna(False),
+    })
+
+    # Exits: held in a quarter but not in the firm's next filed quarter
+    gone = s[s["NextDateKey"].notna() & ~held_after]
+    closed = pd.DataFrame({
+        "FirmKey": gone["FirmKey"],
+        "SecurityKey": gone["SecurityKey"],
+        "DateKey": gone["NextDateKey"],
+        "DeltaShares": -gone["Shares"],
+        "DeltaValue": -gone["Value"],
+        "IsNew": False,
+        "IsClosed": True,
+        "IsIncreased": False,
+        "IsDecreased": False,
+    })
+
+    result = pd.concat([changes, closed], ignore_index=True)
+    result["DateKey"] = result["DateKey"].astype(fact["DateKey"].dtype)
+    if since is not None:
+        result = result[result["DateKey"] >= result["FirmKey"].map(since)]
+    return result.sort_values(["FirmKey", "DateKey", "SecurityKey"], kind="stable").reset_index(drop=True)
+
+
+# Narrow dtypes for the streaming path (only the columns the star schema needs are read)
+STREAM_COLUMNS = ["Company", "Class", "CUSIP", "Value", "Shares", "report_dates"]
+STREAM_DTYPES = {"Company": str, "Class": str, "CUSIP": str, "Value": "Int64", "Shares": "Int64",
+                 "report_dates": str}
+
+
+def _compact(parts, group_cols):
+    # Collapse partial sums into one row per key
+    return (
+        pd.concat(parts, ignore_index=True)
+        .groupby(group_cols, dropna=False, sort=False)
+        .agg(Shares=("Shares", "sum"), Value=("Value", "sum"))
+        .reset_index()
+    )
+
+
+def aggregate_partial(chunk, group_cols):
+    """Shares/Value sums of one chunk (already has DateKey)."""
+    return (
+        chunk.groupby(group_cols, dropna=False, sort=False)
+        .agg(Shares=("Shares", "sum"), Value=("Value", "sum"))
+        .reset_index()
+    )
+
+
+def stream_firm_files(files, chunksize=500_000):
+    """
+    Bounded-memory replacement for load_firm_files + aggregation.
+    Every file is read in chunks with narrow dtypes; per chunk the Firm × CUSIP × DateKey sums,
+    the latest attributes per CUSIP and the distinct dates are folded into running tables.
+    Peak memory depends on the number of distinct keys (plus one chunk), not on the input rows.
+    Returns (agg, sec_attrs) as used by transform_starschema.
+    """
+    group_cols = ["CUSIP", "DateKey"]
+    firm_aggs = []
+    sec_attrs = None
+    for f in files:
+        firm_name = os.path.splitext(os.path.basename(f))[0]
+        parts, pending = [], 0
+        compacted_rows = 0
+        for chunk in iter_holdings(f, chunksize, columns=STREAM_COLUMNS, dtype=STREAM_DTYPES):
+            chunk = add_date_key(chunk)
+            parts.append(aggregate_partial(chunk, group_cols))
+            pending += len(parts[-1])
+            # Re-aggregate once the partial sums outgrow the already compacted table
+            if len(parts) > 1 and pending > max(chunksize, compacted_rows):
+                parts = [_compact(parts, group_cols)]
+                compacted_rows = pending = len(parts[0])
+
+            latest = latest_security_attrs(chunk)
+            sec_attrs = latest if sec_attrs is None else latest_security_attrs(
+                pd.concat([sec_attrs, latest], ignore_index=True)
+            )
+        if parts:
+            firm_agg = _compact(parts, group_cols)
+            firm_agg.insert(0, "FirmName", firm_name)
+            firm_aggs.append(firm_agg)
+
+    if not firm_aggs:
+        # No files or only files without readable chunks: empty tables with the usual dtypes
+        agg = pd.DataFrame({
+            "FirmName": pd.Categorical([]), "CUSIP": pd.Series(dtype=str),
+            "DateKey": pd.Series(dtype="int64"),
+            "Shares": pd.Series(dtype="Int64"), "Value": pd.Series(dtype="Int64"),
+        })
+        if sec_attrs is None:
+            sec_attrs = pd.DataFrame({
+                "CUSIP": pd.Series(dtype=str), "Company": pd.Series(dtype=str),
+                "Class": pd.Series(dtype=str), "report_dates": pd.Series(dtype="datetime64[ns]"),
+            })
+        return agg, sec_attrs
+
+    agg = pd.concat(firm_aggs, ignore_index=True)
+    agg["FirmName"] = agg["FirmName"].astype("category")
+    agg = agg.sort_values(["FirmName", "CUSIP", "DateKey"]).reset_index(drop=True)
+    return agg, sec_attrs
+
+
+def write_tables(tables, output_folder, output_format="csv"):
+    """
+    Write the star schema tables as CSV (one file per table), Parquet (columnar_io.py) or into
+    the embedded warehouse <output_folder>/holdings.sqlite / holdings.duckdb (warehouse.py).
+    """
+    if output_format == "parquet":
+        write_star_schema(tables, output_folder)
+        return
+    if output_format in WAREHOUSE_FORMATS:
+        os.makedirs(output_folder, exist_ok=True)
+        con = connect(os.path.join(output_folder, f"holdings.{output_format}"))
+        try:
+            load_star_schema(con, tables)
+        finally:
+            con.close()
+        return
+    os.makedirs(output_folder, exist_ok=True)
+    for name, table in tables.items():
+        table.to_csv(os.path.join(output_folder, f"{name}.csv"), index=False)
+
+
+def transform_starschema(input_glob: str, output_folder: str, write_csv: bool = True,
+                         output_format: str = "csv", chunksize: int = None, ownership_index: bool = False):
+    """
+    Build the star schema (Dim_Security, Dim_Date, Dim_Firm, Fact_HoldingSnapshot, Fact_PositionChange)
+    from the per-firm holdings files matched by input_glob (CSV or Parquet).
+    output_format: "csv" (one CSV per table), "parquet" (typed Parquet files, fact table
+    partitioned by YearQuarter, see columnar_io.py) or "sqlite"/"duckdb" (indexed tables in
+    one database file, see warehouse.py).
+    chunksize: stream the inputs in chunks of this many rows (bounded memory, see stream_firm_files)
+    instead of loading every file completely.
+    ownership_index: also write the memory-mapped SecurityKey -> DateKey -> holders index
+    (<output_folder>/OwnershipIndex, see ownership_index.py); off by default, only needed for
+    OwnershipIndex lookups.
+    Full rebuild; for refreshes with stable keys see starschema_incremental.update_starschema.
+    """
+    #  1) Load all matching files (CSV or Parquet) and tag FirmName
+    # Replace backslashes for glob compatibility, collect and sort file list.
+    files = sorted(glob.glob(input_glob.replace("\\", "/")))
+    if not files:
+        # Fail early with a clear message if the pattern returns nothing.
+        raise FileNotFoundError(f"No files matched pattern: {input_glob}")
+    if chunksize:
+        # 1-3) Streaming: chunks are folded into the aggregation/attribute tables right away
+        agg, sec_attrs = stream_firm_files(files, chunksize)
+    else:
+        df_all = load_firm_files(files)
+
+        # 2) Parse timestamps and derive the quarter-end DateKey (on the distinct dates only)
+        df_all = add_date_key(df_all)
+
+        # 3) Aggregate to Firm × Security × Quarter
+        agg = aggregate_holdings(df_all)
+        sec_attrs = latest_security_attrs(df_all)
+
+    # 4) Build dimensions (Security, Date, Firm)
+    # Dim_Security: use latest attributes per CUSIP from source rows
+    dim_security = build_dim_security(sec_attrs.drop(columns="report_dates"))
+
+    # Dim_Date: precomputed quarter calendar (gap-free), joined to the facts by DateKey
+    dim_date = build_dim_date(agg["DateKey"].unique())
 
     # Dim_Firm: simple surrogate key for firms (from filename)
     dim_firm = (
@@ -187,31 +524,29 @@ def transform_starschema(input_glob: str, output_folder: str, write_csv: bool =
         .reset_index(drop=True)
     )
 
+    # 5b) Quarter-over-quarter changes (buys/sells/new/closed), so Power BI does not derive them in DAX
+    fact_change = build_position_change(fact_holding)
 
-    #  6) Write CSVs (adds Dim_Firm & Dim_Date)
-    if write_csv:
-        os.makedirs(output_folder, exist_ok=True)
-
-        dim_security.to_csv(
-            os.path.join(output_folder, "Dim_Security.csv"), index=False
-        )
-        dim_date.to_csv(os.path.join(output_folder, "Dim_Date.csv"), index=False)
-        dim_firm.to_csv(os.path.join(output_folder, "Dim_Firm.csv"), index=False)
-
-        fact_holding.to_csv(
-            os.path.join(output_folder, "Fact_HoldingSnapshot.csv"), index=False
-        )
-    # Return DataFrames for optional in-memory use.
-    return {
+    tables = {
         "Dim_Security": dim_security,
         "Dim_Date": dim_date,
         "Dim_Firm": dim_firm,
         "Fact_HoldingSnapshot": fact_holding,
+        "Fact_PositionChange": fact_change,
     }
 
+    #  6) Write CSVs (adds Dim_Firm & Dim_Date) or Parquet
+    if write_csv:
+        write_tables(tables, output_folder, output_format)
+        if ownership_index:
+            build_ownership_index(fact_holding, output_folder)
+    # Return DataFrames for optional in-memory use.
+    return tables
+
 
 # Example direct call (kept as in your original script)
-transform_starschema(
-    r"C:\Users\Niklas\Desktop\SEC_Power BI\*.csv",
-    r"C:\Users\Niklas\Desktop\SEC_Power BI\Dimensions",
-)
+if __name__ == "__main__":
+    transform_starschema(
+        r"C:\Users\Niklas\Desktop\SEC_Power BI\*.csv",
+        r"C:\Users\Niklas\Desktop\SEC_Power BI\Dimensions",
+    )
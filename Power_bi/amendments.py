@@ -0,0 +1,137 @@
+import os
+import json
+import pandas as pd
+
+# Resolution of 13F-HR/A amendments against the current main filing of a reportDate.
+# A resolver gets (main, amendment, upper_threshold, lower_threshold) and returns a decision dict
+#   {"kind": "replacement" | "patch" | "restatement" | "conflict", "reason": str, <diff counts>}
+# apply_amendment turns the decision into the new main; conflicts leave the main unchanged and
+# go to the review queue (review_queue.jsonl + the amendment rows as CSV).
+
+REVIEW_QUEUE_FILE = "review_queue.jsonl"
+KINDS = ("replacement", "patch", "restatement", "conflict")
+
+
+def cusip_signature(df):
+    """
+    One 64-bit hash per CUSIP over its summed Shares/Value (several rows per CUSIP, e.g. per
+    investment discretion, are added up first; missing values count as 0). Indexed by CUSIP, so
+    set operations are hash joins.
+    """
+    totals = df.groupby("CUSIP", sort=False, dropna=False, observed=True)[["Shares", "Value"]].sum()
+    # one dtype for the hash: the parser gives int64, or nullable Int64 if any row lacks a field
+    totals = totals.astype("float64")
+    return pd.Series(pd.util.hash_pandas_object(totals, index=False).to_numpy(), index=totals.index)
+
+
+def diff_holdings(main, amendment):
+    """CUSIP-level diff: shared/new/missing CUSIPs and the shared ones with different Shares or Value."""
+    main_sig = cusip_signature(main)
+    amend_sig = cusip_signature(amendment)
+    shared = main_sig.index.intersection(amend_sig.index)
+    changed = shared[main_sig.loc[shared].to_numpy() != amend_sig.loc[shared].to_numpy()]
+    return {
+        "main_cusips": len(main_sig),
+        "amendment_cusips": len(amend_sig),
+        "shared": len(shared),
+        "changed": len(changed),
+        "new": len(amend_sig) - len(shared),
+        "missing": len(main_sig) - len(shared),
+    }
+
+
+def classify_by_row_count(main, amendment, upper_threshold, lower_threshold):
+    """Original rule: only the row counts of main and amendment are compared."""
+    length_original, length_attachment = len(main), len(amendment)
+    if length_attachment * upper_threshold > length_original:
+        return {"kind": "replacement", "reason": "row count >= upper threshold"}
+    if length_attachment * lower_threshold < length_original:
+        return {"kind": "patch", "reason": "row count <= lower threshold"}
+    return {"kind": "conflict", "reason": "row count between thresholds"}
+
+
+def classify_by_cusip(main, amendment, upper_threshold, lower_threshold):
+    """
+    Decision from the CUSIP-level diff (the row counts are only used as tie-breaker):
+        - amendment contains >= upper_threshold of the main CUSIPs -> replacement (full restated report)
+        - no shared CUSIPs, or the shared ones are unchanged         -> patch (adds the new CUSIPs only)
+        - changed CUSIPs, but <= lower_threshold of the main ones     -> restatement (override those CUSIPs)
+        - changed CUSIPs covering a larger part of the main filing    -> conflict (manual review)
+    """
+    diff = diff_holdings(main, amendment)
+    main_cusips = max(diff["main_cusips"], 1)
+    if diff["shared"] >= upper_threshold * main_cusips:
+        return {"kind": "replacement", "reason": "amendment covers the main filing", **diff}
+    if diff["changed"] == 0:
+        return {"kind": "patch", "reason": "only new CUSIPs", **diff}
+    if diff["shared"] <= lower_threshold * main_cusips:
+        return {"kind": "restatement", "reason": "few CUSIPs restated", **diff}
+    if len(amendment) * upper_threshold > len(main):
+        # large overlap plus enough rows for a full report: a replacement with a few dropped positions
+        return {"kind": "replacement", "reason": "changed CUSIPs, full-size amendment", **diff}
+    return {"kind": "conflict", "reason": "partial amendment changes many CUSIPs", **diff}
+
+
+RESOLVERS = {
+    "cusip": classify_by_cusip,
+    "row_count": classify_by_row_count,
+}
+
+
+def get_resolver(resolver):
+    # Name from RESOLVERS or any callable with the resolver signature
+    if callable(resolver):
+        return resolver
+    try:
+        return RESOLVERS[resolver]
+    except KeyError:
+        raise ValueError(f"unknown resolver {resolver!r}, choose from {sorted(RESOLVERS)}") from None
+
+
+def apply_amendment(main, amendment, decision):
+    """New main filing after the decision (conflicts leave the main unchanged)."""
+    kind = decision["kind"]
+    if kind == "replacement":
+        return amendment
+    if kind == "patch":
+        if "shared" not in decision:  # row-count rule: append the whole amendment as before
+            return pd.concat([main, amendment], ignore_index=True)
+        # only CUSIPs the main filing does not have yet, identical rows are not counted twice
+        added = amendment[~amendment["CUSIP"].isin(main["CUSIP"])]
+        return pd.concat([main, added], ignore_index=True)
+    if kind == "restatement":
+        # the amendment's rows win for every CUSIP it contains
+        kept = main[~main["CUSIP"].isin(amendment["CUSIP"])]
+        return pd.concat([kept, amendment], ignore_index=True)
+    return main
+
+
+def queue_for_review(review_dir, base_name, report_date, accession_number, amendment, decision):
+    """
+    Save the amendment rows as CSV and append one JSON line to <review_dir>/review_queue.jsonl.
+    Appending single lines is safe with several batch processes writing to the same queue.
+    """
+    os.makedirs(review_dir, exist_ok=True)
+    report_str = pd.Timestamp(report_date).strftime("%Y-%m-%d")
+    out_path = os.path.join(review_dir, f"{base_name}_{report_str}_{accession_number}.csv")
+    amendment.to_csv(out_path, index=False)
+    entry = {
+        "firm": base_name,
+        "report_date": report_str,
+        "accession_number": accession_number,
+        "rows": len(amendment),
+        "file": out_path,
+        "queued": pd.Timestamp.now().isoformat(timespec="seconds"),
+        **decision,
+    }
+    with open(os.path.join(review_dir, REVIEW_QUEUE_FILE), "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+    return out_path
+
+
+def read_review_queue(review_dir):
+    """Open review items as DataFrame (empty if nothing was queued)."""
+    path = os.path.join(review_dir, REVIEW_QUEUE_FILE)
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    return pd.read_json(path, lines=True, dtype={"accession_number": str})
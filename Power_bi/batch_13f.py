@@ -0,0 +1,180 @@
+import os
+import re
+import time
+import argparse
+import logging
+import traceback
+import contextlib
+import multiprocessing as mp
+import pandas as pd
+from edgar_cache import EdgarCache
+from edgar_download import RateLimiter, SEC_MAX_REQUESTS_PER_SECOND
+from holdings_13f import ticker_matching_cik, update_13f_csv
+from amendments import RESOLVERS, REVIEW_QUEUE_FILE, read_review_queue
+from instrumentation import Metrics, configure_logging, profiled, summarize_records
+
+# Refresh the 13F holdings of many filers in one run (no input() prompts).
+# Example:
+#   python batch_13f.py filers.txt --email me@example.com --output "C:/SEC_Power BI" --begin 2013-01-01
+# filers.txt: one CIK or ticker per line, optionally followed by ",<file name>"
+#   BRK.B
+#   0001067983,Berkshire Hathaway
+#   # lines starting with # are ignored
+# Stage timings of every filer go to <output>/batch_metrics.jsonl (--profile <folder>: one .prof per filer)
+
+logger = logging.getLogger(__name__)
+
+
+# Set once per worker process by _init_worker (shared budget across the whole pool)
+_worker_limiter = None
+
+
+def read_filer_list(path):
+    """(entry, name or None) for every non-empty, non-comment line of the filer file."""
+    filers = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            entry, _, name = line.partition(",")
+            filers.append((entry.strip(), name.strip() or None))
+    return filers
+
+
+def _file_name(name):
+    # Firm name becomes the CSV name (and FirmName in the star schema), keep it filesystem safe
+    return re.sub(r'[\\/:*?"<>|]+', " ", name).strip()
+
+
+def resolve_filers(filers, user_email, cache=None):
+    """
+    Turn (entry, name) pairs into (cik, name) pairs.
+    Tickers are resolved through ticker_matching_cik (cached ticker map); pure digits are taken as CIK.
+    Unknown tickers are reported and skipped.
+    """
+    headers = {"User-Agent": user_email}
+    cache = cache if cache is not None else EdgarCache()
+    resolved = []
+    for entry, name in filers:
+        if entry.isdigit():
+            resolved.append((entry.zfill(10), name or entry.zfill(10)))
+            continue
+        cik, company_name = ticker_matching_cik(entry, headers=headers, cache=cache)
+        if cik is None:
+            logger.warning("[batch] unknown ticker skipped: %s", entry)
+            continue
+        resolved.append((cik, name or company_name))
+    return resolved
+
+
+def _init_worker(max_per_second, lock, next_slot, log_level=None):
+    global _worker_limiter
+    _worker_limiter = RateLimiter(max_per_second, lock=lock, next_slot=next_slot)
+    if log_level is not None:  # spawned workers do not inherit the logging setup
+        configure_logging(log_level)
+
+
+def _run_filer(job):
+    # One filer per task; any error is returned instead of raised so the rest of the batch continues
+    (cik, name, user_email, output_dir, begin_date, incremental, review_dir, file_format, resolver,
+     profile_dir) = job
+    full_path = os.path.join(output_dir, f"{_file_name(name)}.{file_format}")
+    metrics = Metrics(run=name)
+    profile = (profiled(os.path.join(profile_dir, f"{_file_name(name)}.prof")) if profile_dir
+               else contextlib.nullcontext())
+    start = time.perf_counter()
+    try:
+        with profile:
+            result = update_13f_csv(user_email, cik, full_path, begin_date, incremental=incremental,
+                                    review_dir=review_dir, limiter=_worker_limiter, resolver=resolver,
+                                    metrics=metrics)
+        return {"cik": cik, "name": name, "status": "ok", "rows": len(result), "file": full_path,
+                "seconds": round(time.perf_counter() - start, 2), "error": "", "metrics": metrics.records}
+    except Exception as exc:
+        return {"cik": cik, "name": name, "status": "failed", "rows": 0, "file": full_path,
+                "seconds": round(time.perf_counter() - start, 2),
+                "error": f"{type(exc).__name__}: {exc}\n{traceback.format_exc(limit=3)}",
+                "metrics": metrics.records}
+
+
+def run_batch(filers, user_email, output_dir, begin_date, incremental=True, processes=4,
+              max_per_second=SEC_MAX_REQUESTS_PER_SECOND, review_dir=None, file_format="csv",
+              resolver="cusip", profile_dir=None, log_level=None):
+    """
+    Refresh the 13F CSVs of many filers.
+    - filers: (cik, name) pairs (see resolve_filers); every filer writes <output_dir>/<name>.csv
+      (file_format="parquet": <name>.parquet with explicit column types)
+    - the filers are spread over a process pool; all processes share one download rate limiter
+    - progress is printed per filer as it finishes, a failing filer does not stop the others
+    - amendments are resolved automatically (amendments.py), only conflicts end up in
+      <review_dir>/review_queue.jsonl (default <output_dir>/main_or_attachment)
+    - returns (and writes to <output_dir>/batch_summary.jsonl) one status row per filer
+    - stage records of all filers (instrumentation.py) go to <output_dir>/batch_metrics.jsonl,
+      the per-stage totals are logged at the end; profile_dir: one cProfile .prof file per filer
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    review_dir = review_dir or os.path.join(output_dir, "main_or_attachment")
+    os.makedirs(review_dir, exist_ok=True)
+
+    if profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+
+    jobs = [(cik, name, user_email, output_dir, begin_date, incremental, review_dir, file_format, resolver,
+             profile_dir)
+            for cik, name in filers]
+    lock = mp.Lock()
+    next_slot = mp.Value("d", 0.0, lock=False)  # guarded by `lock`
+    summary, records = [], []
+    with mp.Pool(processes, initializer=_init_worker,
+                 initargs=(max_per_second, lock, next_slot, log_level)) as pool:
+        for done, status in enumerate(pool.imap_unordered(_run_filer, jobs), start=1):
+            records.extend(status.pop("metrics"))
+            summary.append(status)
+            logger.info("[batch %d/%d] %s (%s): %s, %d rows, %s s", done, len(jobs), status["name"],
+                        status["cik"], status["status"], status["rows"], status["seconds"])
+            if status["error"]:
+                logger.error(status["error"])
+
+    summary = pd.DataFrame(summary, columns=["cik", "name", "status", "rows", "file", "seconds", "error"])
+    # JSON lines, so the "*.csv" glob of the star schema does not pick the summary up as a firm
+    summary.to_json(os.path.join(output_dir, "batch_summary.jsonl"), orient="records", lines=True)
+    pd.DataFrame(records).to_json(os.path.join(output_dir, "batch_metrics.jsonl"), orient="records", lines=True)
+    logger.info("[batch] time per stage (all filers):\n%s", summarize_records(records))
+    failed = (summary["status"] != "ok").sum()
+    logger.info("[batch] finished: %d ok, %d failed", len(summary) - failed, failed)
+    queued = read_review_queue(review_dir)
+    if len(queued):
+        logger.warning("[batch] %d amendments waiting for review: %s", len(queued),
+                       os.path.join(review_dir, REVIEW_QUEUE_FILE))
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Refresh 13F holdings CSVs for a list of CIKs/tickers.")
+    parser.add_argument("filer_file", help="text file with one CIK or ticker per line (optional ',name')")
+    parser.add_argument("--email", required=True, help="email address for the SEC User-Agent header")
+    parser.add_argument("--output", required=True, help="folder for the per-firm CSV files")
+    parser.add_argument("--begin", default="2013-01-01", help="first 'Period of Report' (YYYY-MM-DD)")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--max-per-second", type=float, default=SEC_MAX_REQUESTS_PER_SECOND)
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv", help="per-firm output file type")
+    parser.add_argument("--resolver", choices=sorted(RESOLVERS), default="cusip",
+                        help="amendment resolution: CUSIP-level diff or the original row-count rule")
+    parser.add_argument("--full", action="store_true", help="rebuild every file instead of incremental refresh")
+    parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+                        help="DEBUG also logs every parsed filing (head/info)")
+    parser.add_argument("--profile", metavar="FOLDER", help="write a cProfile .prof file per filer to FOLDER")
+    args = parser.parse_args(argv)
+
+    configure_logging(args.log_level)
+    filers = resolve_filers(read_filer_list(args.filer_file), args.email)
+    summary = run_batch(filers, args.email, args.output, args.begin, incremental=not args.full,
+                        processes=args.processes, max_per_second=args.max_per_second,
+                        file_format=args.format, resolver=args.resolver, profile_dir=args.profile,
+                        log_level=args.log_level)
+    return 0 if (summary["status"] == "ok").all() else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,388 @@
+import io
+import os
+import sys
+import time
+import logging
+import random
+import tempfile
+import subprocess
+import pandas as pd
+from infotable_parser import parse_infotable_xml, parse_infotable_bs4
+from instrumentation import log_frame
+from Raw_data_to_star_schema import (
+    CLASS_MAP, INVERSE_HINTS_CLASS, INVERSE_HINTS_ISSUER, classify_via_dict, classify_frame, _norm
+)
+
+# Benchmarks for the 13F pipeline on synthetic data (no SEC access needed).
+# Run from the Power_bi folder:  python benchmarks.py
+
+
+def synthetic_infotable_xml(n_rows: int, seed: int = 42) -> bytes:
+    """Build a 13F information table with n_rows <infoTable> entries (same layout as EDGAR)."""
+    rng = random.Random(seed)
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<informationTable xmlns="http://www.sec.gov/edgar/document/thirteenf/informationtable">'
+    ]
+    for i in range(n_rows):
+        parts.append(
+            "<infoTable>"
+            f"<nameOfIssuer>ISSUER {i % 5000} INC</nameOfIssuer>"
+            f"<titleOfClass>{rng.choice(['COM', 'CL A', 'NOTE 2.5% 2030', 'CALL', 'ETF'])}</titleOfClass>"
+            f"<cusip>{i % 5000:09d}</cusip>"
+            f"<value>{rng.randint(1, 10**9)}</value>"
+            "<shrsOrPrnAmt>"
+            f"<sshPrnamt>{rng.randint(1, 10**8)}</sshPrnamt>"
+            f"<sshPrnamtType>{rng.choice(['SH', 'PRN'])}</sshPrnamtType>"
+            "</shrsOrPrnAmt>"
+            f"<investmentDiscretion>{rng.choice(['SOLE', 'DFND', 'OTR'])}</investmentDiscretion>"
+            "<votingAuthority><Sole>0</Sole><Shared>0</Shared><None>0</None></votingAuthority>"
+            "</infoTable>"
+        )
+    parts.append("</informationTable>")
+    return "".join(parts).encode("utf-8")
+
+
+def _best_of(func, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def bench_infotable_parsing(n_rows: int = 20000, repeat: int = 3):
+    """Compare the streaming lxml parser with the original BeautifulSoup path."""
+    xml = synthetic_infotable_xml(n_rows)
+    t_bs4, df_bs4 = _best_of(lambda: parse_infotable_bs4(xml), repeat)
+    t_lxml, df_lxml = _best_of(lambda: parse_infotable_xml(xml), repeat)
+
+    # Both engines have to deliver the same holdings
+    pd.testing.assert_frame_equal(
+        df_lxml.astype({"SharesType": object, "Discretion": object}),
+        df_bs4,
+        check_dtype=False,
+    )
+    print(f"infoTable parsing ({n_rows} rows, {len(xml) / 1e6:.1f} MB)")
+    print(f"  BeautifulSoup: {t_bs4:8.3f} s")
+    print(f"  lxml iterparse: {t_lxml:8.3f} s  ({t_bs4 / t_lxml:.1f}x faster)")
+    print(f"  memory BeautifulSoup frame: {df_bs4.memory_usage(deep=True).sum() / 1e6:.1f} MB, "
+          f"typed frame: {df_lxml.memory_usage(deep=True).sum() / 1e6:.1f} MB")
+
+
+def synthetic_securities(n_rows: int, seed: int = 7) -> pd.DataFrame:
+    """Noisy Class/issuer strings built from the classifier keywords (plus random text and gaps)."""
+    rng = random.Random(seed)
+    keywords = [k for kws in CLASS_MAP.values() for k in kws] + INVERSE_HINTS_CLASS
+    fillers = ["", " ", "2.5% 2030", "NEW", "PAR $0.01", "SER B", "UNIT", "CALL", "PUT", "1X", "XYZ", "cl a "]
+    issuers = INVERSE_HINTS_ISSUER + ["APPLE INC", "ISHARES TR", "SPDR S&P 500 ETF TR", "direxion shs etf tr", None]
+    classes, companies = [], []
+    for _ in range(n_rows):
+        parts = rng.sample(keywords, rng.randint(0, 2)) + rng.sample(fillers, rng.randint(0, 2))
+        rng.shuffle(parts)
+        text = " ".join(parts)
+        classes.append(rng.choice([text, text.lower(), f" {text} ", None]) if rng.random() < 0.98 else float("nan"))
+        companies.append(rng.choice(issuers))
+    return pd.DataFrame({"Class": classes, "Company": companies})
+
+
+def check_classifier_equivalence(n_rows: int = 50000):
+    """classify_frame has to return exactly what classify_via_dict returns for every row."""
+    sec = synthetic_securities(n_rows)
+    expected = sec.apply(lambda r: classify_via_dict(r["Class"], r["Company"]), axis=1, result_type="expand")
+    expected.columns = ["SecurityType", "SecuritySubtype", "IsInverseLeveraged"]
+    expected["Class_Normalized"] = sec["Class"].apply(_norm)
+    got = classify_frame(sec["Class"], sec["Company"])
+    for col in expected.columns:
+        mismatch = (got[col].astype(object).to_numpy() != expected[col].astype(object).to_numpy())
+        assert not mismatch.any(), f"{col} differs for {sec[mismatch].head()}"
+    print(f"classifier equivalence: {n_rows} rows identical")
+
+
+def check_amendment_missing_value(n_rows: int = 2000):
+    """
+    diff_holdings of a main filing (int64 columns) against an amendment that repeats it and adds one
+    holding without <value>: parsed with lxml (nullable Int64) or BeautifulSoup (float64), only the
+    new CUSIP may count, nothing as changed.
+    """
+    from amendments import diff_holdings, classify_by_cusip
+    main_xml = synthetic_infotable_xml(n_rows)
+    extra = (b"<infoTable><nameOfIssuer>NEW ISSUER INC</nameOfIssuer><titleOfClass>COM</titleOfClass>"
+             b"<cusip>NEWCUSIP1</cusip><shrsOrPrnAmt><sshPrnamt>100</sshPrnamt><sshPrnamtType>SH</sshPrnamtType>"
+             b"</shrsOrPrnAmt><investmentDiscretion>SOLE</investmentDiscretion></infoTable>")
+    amendment_xml = main_xml.replace(b"</informationTable>", extra + b"</informationTable>")
+    main = parse_infotable_xml(main_xml)
+    for parse in (parse_infotable_xml, parse_infotable_bs4):
+        amendment = parse(amendment_xml)
+        diff = diff_holdings(main, amendment)
+        assert diff["changed"] == 0 and diff["new"] == 1 and diff["missing"] == 0, (parse.__name__, diff)
+        assert classify_by_cusip(main, amendment, 0.8, 0.2)["kind"] == "replacement", parse.__name__
+        print(f"amendment with a missing value ({parse.__name__}, Value {amendment['Value'].dtype}): "
+              f"{diff['shared']} shared CUSIPs unchanged, 1 new")
+
+
+def check_recorded_downloads(n_filings=16, rows_per_filing=500, max_workers=4, max_per_second=8):
+    """
+    download_attachments end to end against recorded filings served locally (serve_recorded_filings):
+    every attachment arrives once, parses to the same table as the recorded file and the rate limit holds.
+    """
+    from edgar_download import download_attachments, serve_recorded_filings
+    from instrumentation import Metrics
+    with tempfile.TemporaryDirectory() as folder:
+        jobs, recorded = [], {}
+        for i in range(n_filings):
+            acc = f"0001067983-{i // 4 + 20:02d}-{i:06d}"
+            path = f"Archives/edgar/data/1067983/{acc.replace('-', '')}/infotable.xml"
+            os.makedirs(os.path.dirname(os.path.join(folder, path)), exist_ok=True)
+            recorded[acc] = synthetic_infotable_xml(rows_per_filing, seed=i)
+            with open(os.path.join(folder, path), "wb") as f:
+                f.write(recorded[acc])
+            jobs.append((acc, f"https://www.sec.gov/{path}"))
+        server = serve_recorded_filings(folder)
+        metrics = Metrics(run="recorded")
+        start = time.perf_counter()
+        try:
+            downloaded = dict(download_attachments(
+                jobs, {"User-Agent": "benchmark admin@example.com"}, max_workers=max_workers,
+                max_per_second=max_per_second, base_url=f"http://127.0.0.1:{server.server_port}", metrics=metrics,
+            ))
+        finally:
+            server.shutdown()
+            server.server_close()
+        elapsed = time.perf_counter() - start
+    assert downloaded == recorded, "downloaded attachments differ from the recorded files"
+    for acc, content in downloaded.items():
+        assert parse_infotable_xml(content).equals(parse_infotable_xml(recorded[acc])), acc
+    assert elapsed >= (n_filings - 1) / max_per_second * 0.9, f"rate limit exceeded ({elapsed:.2f} s)"
+    summary = metrics.summary().loc["download"]
+    print(f"recorded downloads: {n_filings} filings, {int(summary['bytes'])} bytes in {elapsed:.2f} s "
+          f"(limit {max_per_second}/s), all parsed identically")
+
+
+def bench_security_classifier(n_rows: int = 50000, repeat: int = 3):
+    """Row-wise classify_via_dict (apply axis=1) vs. compiled classify_frame."""
+    sec = synthetic_securities(n_rows)
+    t_apply, _ = _best_of(
+        lambda: sec.apply(lambda r: classify_via_dict(r["Class"], r["Company"]), axis=1, result_type="expand"),
+        repeat,
+    )
+    t_frame, _ = _best_of(lambda: classify_frame(sec["Class"], sec["Company"]), repeat)
+    print(f"security classifier ({n_rows} rows)")
+    print(f"  apply(classify_via_dict): {t_apply:8.3f} s")
+    print(f"  classify_frame:           {t_frame:8.3f} s  ({t_apply / t_frame:.1f}x faster)")
+
+
+def write_synthetic_firm_files(folder, n_firms=5, n_quarters=40, rows_per_quarter=5000, seed=1,
+                               n_securities=20000):
+    """
+    Per-firm holdings CSVs like csv__with_13fdata writes them (n_quarters quarters back from 2024).
+    - n_securities: size of the CUSIP pool; well below rows_per_quarter means many rows per
+      (firm, CUSIP, date) key, as with positions split over several managers / discretion types
+    """
+    rng = random.Random(seed)
+    dates = pd.date_range(end="2024-12-31", periods=n_quarters, freq="QE")
+    classes = ["COM", "CL A", "NOTE 2.5% 2030", "CALL", "ETF", "SPONSORED ADR", "PFD SER A"]
+    for firm in range(n_firms):
+        frames = []
+        for date in dates:
+            ids = [rng.randrange(n_securities) for _ in range(rows_per_quarter)]
+            frames.append(pd.DataFrame({
+                "Company": [f"ISSUER {i} INC" for i in ids],
+                "Class": [classes[i % len(classes)] for i in ids],
+                "CUSIP": [f"{i:06d}10{i % 10}" for i in ids],
+                "Value": [rng.randint(1, 10**9) for _ in ids],
+                "Shares": [rng.randint(1, 10**7) for _ in ids],
+                "SharesType": "SH",
+                "Discretion": "SOLE",
+                "report_dates": date,
+            }))
+        pd.concat(frames, ignore_index=True).to_csv(os.path.join(folder, f"Firm_{firm}.csv"), index=False)
+
+
+def _peak_rss_mb(code):
+    # Run `code` in a fresh interpreter and report its peak resident set size in MB.
+    # Linux: VmHWM of the new process image (ru_maxrss keeps the parent's peak across fork/exec),
+    # elsewhere ru_maxrss (KB)
+    script = f"""
+import resource
+{code}
+try:
+    with open("/proc/self/status") as f:
+        print(next(int(line.split()[1]) for line in f if line.startswith("VmHWM:")) / 1024)
+except OSError:
+    print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+"""
+    out = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.abspath(__file__)))
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def bench_starschema_memory(n_firms=5, n_quarters=40, rows_per_quarter=5000, n_securities=200,
+                            chunksize=100_000):
+    """
+    Peak RSS of transform_starschema: full load vs. chunked streaming (same inputs, no output files).
+    The inputs repeat each (firm, CUSIP, date) key many times, so the aggregated table is a small
+    fraction of the input rows - the case streaming is meant for.
+    """
+    with tempfile.TemporaryDirectory() as folder:
+        write_synthetic_firm_files(folder, n_firms, n_quarters, rows_per_quarter, n_securities=n_securities)
+        pattern = os.path.join(folder, "*.csv")
+        size_mb = sum(os.path.getsize(os.path.join(folder, f)) for f in os.listdir(folder)) / 1e6
+        n_keys = sum(
+            len(pd.read_csv(os.path.join(folder, f), usecols=["CUSIP", "report_dates"]).drop_duplicates())
+            for f in os.listdir(folder)
+        )
+        call = "from Raw_data_to_star_schema import transform_starschema\n" \
+               f"transform_starschema({pattern!r}, '', write_csv=False{{}})"
+        full = _peak_rss_mb(call.format(""))
+        streamed = _peak_rss_mb(call.format(f", chunksize={chunksize}"))
+    n_rows = n_firms * n_quarters * rows_per_quarter
+    print(f"transform_starschema peak RSS ({n_rows} rows, {size_mb:.0f} MB CSV, "
+          f"{n_keys} firm x CUSIP x date keys = {n_rows / n_keys:.0f} rows per key)")
+    print(f"  full load:              {full:8.0f} MB")
+    print(f"  chunksize={chunksize}: {streamed:8.0f} MB  ({full / streamed:.1f}x less)")
+
+
+def synthetic_filing_history(n_years=25, rows_per_filing=2000, seed=3):
+    """
+    Metadata + parsed holdings like load_13f_metadata/fetch_parsed_tables return them:
+    one 13F-HR per quarter, some quarters with a replacement (13F-HR/A with all rows) or a small patch.
+    """
+    rng = random.Random(seed)
+    meta, tables = [], {}
+    for q, report_date in enumerate(pd.date_range(end="2024-12-31", periods=n_years * 4, freq="QE")):
+        sizes = [rows_per_filing]
+        kind = rng.random()
+        if kind < 0.15:
+            sizes.append(rows_per_filing)  # replacement
+        elif kind < 0.30:
+            sizes.append(rows_per_filing // 20)  # patch
+        for a, size in enumerate(sizes):
+            acc = f"0000000000-{q:02d}-{a:06d}"
+            meta.append({"accession_number": acc, "reportDate": report_date,
+                         "filing_date": report_date + pd.Timedelta(days=45 + 30 * a)})
+            tables[acc] = parse_infotable_xml(synthetic_infotable_xml(size, seed=q * 10 + a))
+    df = pd.DataFrame(meta).sort_values(["reportDate", "filing_date"], ascending=[False, True])
+    return df, tables
+
+
+def _combine_filings_walk(df, parsed_tables, upper_threshold=0.8, lower_threshold=0.2):
+    # Reference: the original reportDate walk (df re-filtered per period, concat per filing/period)
+    # with the same per-filing debug logging as combine_filings
+    from holdings_13f import VALUE_CUTOFF, logger
+    i, n = 0, len(df)
+    final_dataframe = pd.DataFrame()
+    while i < n:
+        current_date = df.iloc[i, :]
+        same_date_df = df[df["reportDate"] == current_date["reportDate"]]
+        length_original = 0
+        main_dataframe = pd.DataFrame()
+        subsidiary_dataframe = pd.DataFrame()
+        for w in range(len(same_date_df)):
+            acc = same_date_df.iloc[w]["accession_number"]
+            data_frame = parsed_tables[acc]
+            log_frame(logger, f"filing {w}: {acc}", data_frame)
+            data_frame["report_dates"] = current_date["reportDate"]
+            if pd.to_datetime(current_date["reportDate"]) < VALUE_CUTOFF:
+                data_frame["Value"] = data_frame["Value"] * 1000
+            if w == 0:
+                length_original = len(data_frame)
+                main_dataframe = data_frame
+            elif len(data_frame) * upper_threshold > length_original:
+                main_dataframe = data_frame
+            elif len(data_frame) * lower_threshold < length_original:
+                subsidiary_dataframe = pd.concat([subsidiary_dataframe, data_frame], ignore_index=True)
+        complete_dataframe = pd.concat([main_dataframe, subsidiary_dataframe], ignore_index=True)
+        i += len(same_date_df)
+        final_dataframe = pd.concat([final_dataframe, complete_dataframe], ignore_index=True)
+    return final_dataframe
+
+
+def bench_combine_filings(n_years=25, rows_per_filing=2000, repeat=3):
+    """Original reportDate walk vs. single-pass groupby in combine_filings (same row-count rule, same result)."""
+    from holdings_13f import combine_filings  # needs edgartools (imported by holdings_13f)
+    df, tables = synthetic_filing_history(n_years, rows_per_filing)
+
+    def fresh():
+        # combine_filings adds report_dates / scales Value in place, so every run gets its own copies
+        return {acc: t.copy() for acc, t in tables.items()}
+
+    t_walk, expected = _best_of(lambda: _combine_filings_walk(df, fresh()), repeat)
+    t_group, got = _best_of(lambda: combine_filings(df, fresh(), "bench", review_dir=tempfile.gettempdir(),
+                                                    resolver="row_count"), repeat)
+    pd.testing.assert_frame_equal(got, expected)
+    print(f"combine_filings ({n_years} years, {len(df)} filings, {len(got)} rows)")
+    print(f"  reportDate walk:   {t_walk:8.3f} s")
+    print(f"  groupby + concat:  {t_group:8.3f} s  ({t_walk / t_group:.1f}x faster)")
+
+
+def bench_debug_output(n_years=25, rows_per_filing=2000, repeat=3):
+    """combine_filings with the former print(head)/print(info()) per filing vs. DEBUG logging switched off."""
+    import holdings_13f
+    from holdings_13f import combine_filings
+    df, tables = synthetic_filing_history(n_years, rows_per_filing)
+
+    def run():
+        return combine_filings(df, {acc: t.copy() for acc, t in tables.items()}, "bench",
+                               review_dir=tempfile.gettempdir(), resolver="row_count")
+
+    logger = holdings_13f.logger
+    handler = logging.StreamHandler(io.StringIO())
+    old_level, old_propagate = logger.level, logger.propagate
+    logger.addHandler(handler)
+    logger.propagate = False
+    try:
+        logger.setLevel(logging.DEBUG)  # same output as the old prints (into a buffer)
+        t_debug, _ = _best_of(run, repeat)
+        logger.setLevel(logging.INFO)
+        t_info, _ = _best_of(run, repeat)
+    finally:
+        logger.removeHandler(handler)
+        logger.setLevel(old_level)
+        logger.propagate = old_propagate
+    print(f"combine_filings debug output ({len(df)} filings)")
+    print(f"  DEBUG (head + info per filing): {t_debug:8.3f} s")
+    print(f"  INFO:                           {t_info:8.3f} s  ({t_debug / t_info:.1f}x faster)")
+
+
+def bench_warehouse_query(n_firms=5, n_quarters=20, rows_per_quarter=5000, repeat=3):
+    """'Who holds CUSIP X in quarter Q': re-reading the firm CSVs vs. the indexed SQLite warehouse."""
+    from Raw_data_to_star_schema import transform_starschema
+    from warehouse import connect, cusip_ownership
+    with tempfile.TemporaryDirectory() as folder:
+        write_synthetic_firm_files(folder, n_firms, n_quarters, rows_per_quarter)
+        pattern = os.path.join(folder, "*.csv")
+        tables = transform_starschema(pattern, os.path.join(folder, "warehouse"), output_format="sqlite")
+        fact = tables["Fact_HoldingSnapshot"]
+        cusip, date_key = fact["SecurityKey"].iloc[0], int(fact["DateKey"].iloc[0])
+        report_date = pd.to_datetime(str(date_key), format="%Y%m%d")
+
+        def from_csv():
+            frames = []
+            for name in sorted(os.listdir(folder)):
+                if name.endswith(".csv"):
+                    df = pd.read_csv(os.path.join(folder, name), dtype={"CUSIP": str}, parse_dates=["report_dates"])
+                    frames.append(df[(df["CUSIP"] == cusip) & (df["report_dates"] == report_date)].assign(FirmName=name))
+            return pd.concat(frames, ignore_index=True)
+
+        con = connect(os.path.join(folder, "warehouse", "holdings.sqlite"))
+        t_csv, _ = _best_of(from_csv, repeat)
+        t_db, owners = _best_of(lambda: cusip_ownership(con, cusip, date_key), repeat)
+        con.close()
+    print(f"CUSIP ownership query ({n_firms} firms, {len(fact)} fact rows, {len(owners)} holders)")
+    print(f"  read firm CSVs:   {t_csv * 1000:10.1f} ms")
+    print(f"  SQLite warehouse: {t_db * 1000:10.1f} ms  ({t_csv / t_db:.0f}x faster)")
+
+
+if __name__ == "__main__":
+    bench_infotable_parsing()
+    check_classifier_equivalence()
+    check_amendment_missing_value()
+    check_recorded_downloads()
+    bench_security_classifier()
+    bench_starschema_memory()
+    bench_combine_filings()
+    bench_debug_output()
+    bench_warehouse_query()
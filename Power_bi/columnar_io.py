@@ -0,0 +1,157 @@
+import os
+import shutil
+import pandas as pd
+
+try:  # optional dependency, only needed for the Parquet path (pip install pyarrow)
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    import pyarrow.dataset as pads
+except ImportError:
+    pa = None
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("Parquet output needs pyarrow: pip install pyarrow")
+
+
+def _types():
+    # Explicit column types, columns not listed here keep the type pyarrow infers
+    dictionary = pa.dictionary(pa.int32(), pa.string())
+    return {
+        # 13F holdings (csv__with_13fdata / holdings_13f)
+        "Company": pa.string(),
+        "Class": pa.string(),
+        "CUSIP": dictionary,
+        "Value": pa.int64(),
+        "Shares": pa.int64(),
+        "SharesType": dictionary,
+        "Discretion": dictionary,
+        "report_dates": pa.date32(),
+        "FirmName": dictionary,
+        # star schema
+        "FirmKey": pa.int32(),
+        "SecurityKey": dictionary,
+        "DateKey": pa.int32(),
+        "Date": pa.date32(),
+        "Year": pa.int16(),
+        "Quarter": pa.int8(),
+        "YearQuarter": pa.string(),
+        "IssuerCompanyName": pa.string(),
+        "Class_Normalized": pa.string(),
+        "SecurityType": dictionary,
+        "SecuritySubtype": dictionary,
+        "IsInverseLeveraged": pa.bool_(),
+        "IsEquity": pa.bool_(),
+        # Fact_PositionChange
+        "DeltaShares": pa.int64(),
+        "DeltaValue": pa.int64(),
+        "IsNew": pa.bool_(),
+        "IsClosed": pa.bool_(),
+        "IsIncreased": pa.bool_(),
+        "IsDecreased": pa.bool_(),
+    }
+
+
+def to_arrow(df):
+    """pandas -> Arrow table with the explicit types above (int64 measures, dictionary CUSIP/names, date32)."""
+    _require_pyarrow()
+    types = _types()
+    df = df.copy()
+    for col in df.columns:
+        if col in ("report_dates", "Date"):
+            df[col] = pd.to_datetime(df[col]).dt.date
+        elif col in types and pa.types.is_integer(types[col]):
+            df[col] = df[col].astype("Int64")
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    schema = pa.schema([
+        pa.field(name, types.get(name, table.schema.field(name).type)) for name in table.column_names
+    ])
+    return table.cast(schema)
+
+
+def write_table(df, path):
+    """Write one DataFrame as a single Parquet file (zstd compressed)."""
+    pq.write_table(to_arrow(df), path, compression="zstd")
+
+
+def read_table(path, columns=None, filters=None):
+    """Read a Parquet file or partitioned folder back into pandas (dictionary columns -> categoricals)."""
+    _require_pyarrow()
+    return pq.read_table(path, columns=columns, filters=filters).to_pandas()
+
+
+def write_holdings(df, path):
+    """Holdings output of csv__with_13fdata: .parquet -> Parquet, everything else CSV."""
+    if str(path).lower().endswith(".parquet"):
+        write_table(df, path)
+    else:
+        df.to_csv(path, index=False)
+
+
+def read_holdings(path, columns=None):
+    """Read a holdings file written by write_holdings, report_dates as datetime."""
+    if str(path).lower().endswith(".parquet"):
+        df = read_table(path, columns=columns)
+    else:
+        # CUSIP as text, otherwise numeric-looking CUSIPs lose their leading zeros
+        df = pd.read_csv(path, usecols=columns, dtype={"CUSIP": str})
+    if "report_dates" in df:
+        df["report_dates"] = pd.to_datetime(df["report_dates"])
+    return df
+
+
+def iter_holdings(path, chunksize, columns=None, dtype=None):
+    """Read a holdings file in chunks of `chunksize` rows (CSV via read_csv, Parquet via record batches)."""
+    if str(path).lower().endswith(".parquet"):
+        _require_pyarrow()
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=columns, dtype=dtype, chunksize=chunksize)
+
+
+def write_star_schema(tables, output_folder, replace_all=True, replace_quarters=None):
+    """
+    Dimensions as single Parquet files, the fact table as dataset partitioned by YearQuarter
+    (Fact_HoldingSnapshot/YearQuarter=2024Q1/part-0.parquet ...), so loads can skip whole quarters.
+    replace_all=False only replaces the quarters contained in the given fact rows.
+    replace_quarters: {fact name: YearQuarters} rewritten from the given rows; their partitions are
+    deleted when no row is left (e.g. all holdings of the quarter belonged to removed firms).
+    """
+    _require_pyarrow()
+    os.makedirs(output_folder, exist_ok=True)
+    for name, df in tables.items():
+        if name.startswith("Fact_"):
+            continue
+        write_table(df, os.path.join(output_folder, f"{name}.parquet"))
+
+    year_quarter = tables["Dim_Date"].set_index("DateKey")["YearQuarter"]
+    for name, df in tables.items():
+        if not name.startswith("Fact_"):
+            continue
+        fact = df.assign(YearQuarter=df["DateKey"].map(year_quarter))
+        fact_folder = os.path.join(output_folder, name)
+        if replace_all and os.path.isdir(fact_folder):
+            shutil.rmtree(fact_folder)
+        emptied = set((replace_quarters or {}).get(name, ())) - set(fact["YearQuarter"].dropna())
+        for quarter in emptied:
+            shutil.rmtree(os.path.join(fact_folder, f"YearQuarter={quarter}"), ignore_errors=True)
+        pads.write_dataset(
+            to_arrow(fact),
+            fact_folder,
+            format="parquet",
+            partitioning=pads.partitioning(pa.schema([("YearQuarter", pa.string())]), flavor="hive"),
+            existing_data_behavior="delete_matching",  # rewritten quarters replace their old partition
+            file_options=pads.ParquetFileFormat().make_write_options(compression="zstd"),
+        )
+
+
+def read_fact(output_folder, name="Fact_HoldingSnapshot", year_quarters=None, columns=None):
+    """Load the fact table, optionally only some quarters (other partitions are not touched)."""
+    _require_pyarrow()
+    dataset = pads.dataset(os.path.join(output_folder, name), format="parquet", partitioning="hive")
+    # typed value set, so an empty selection gives an empty frame instead of a null-type error
+    flt = (pads.field("YearQuarter").isin(pa.array(list(year_quarters), type=pa.string()))
+           if year_quarters is not None else None)
+    return dataset.to_table(columns=columns, filter=flt).to_pandas()
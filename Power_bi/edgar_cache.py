@@ -0,0 +1,166 @@
+import os
+import io
+import gzip
+import json
+import time
+import sqlite3
+import hashlib
+import contextlib
+import pandas as pd
+
+
+# Default location, can be moved with the SEC13F_CACHE environment variable
+DEFAULT_CACHE_DIR = os.environ.get("SEC13F_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "sec13f"))
+TICKER_TTL = 24 * 3600  # company_tickers.json changes daily at most
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3  # 2 GB on disk before the least recently used entries are dropped
+
+
+class EdgarCache:
+    """
+    Persistent, content-addressed cache for EDGAR downloads.
+    - raw bytes are stored gzip-compressed under their sha256 (identical content is stored once)
+    - keys are accession numbers and/or urls pointing to a content hash
+    - an optional parsed copy (typed DataFrame) is stored next to the raw file, so a cached
+      filing skips both download and parsing
+    - entries with a TTL (ticker map) are refreshed after expiry, filings never expire
+    - when the cache grows above max_bytes the least recently used contents are evicted
+    The index lives in a small sqlite file, so several processes can share one cache folder.
+    """
+
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        with self._connect() as con:
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS keys (key TEXT PRIMARY KEY, digest TEXT NOT NULL, expires REAL)"
+            )
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS objects (digest TEXT PRIMARY KEY, size INTEGER NOT NULL, "
+                "parsed_size INTEGER NOT NULL DEFAULT 0, last_access REAL NOT NULL)"
+            )
+
+    @contextlib.contextmanager
+    def _connect(self):
+        # One transaction per block (commit / rollback), the connection is closed afterwards
+        # (sqlite3's own context manager only commits)
+        con = sqlite3.connect(os.path.join(self.root, "index.sqlite"), timeout=60)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def _path(self, digest, suffix):
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}{suffix}")
+
+    def _lookup(self, key):
+        # Returns the digest for a valid (not expired) key and marks it as recently used
+        with self._connect() as con:
+            row = con.execute("SELECT digest, expires FROM keys WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            digest, expires = row
+            if expires is not None and expires < time.time():
+                return None
+            con.execute("UPDATE objects SET last_access = ? WHERE digest = ?", (time.time(), digest))
+        return digest
+
+    # --- raw bytes
+    def get(self, key):
+        """Raw bytes stored under key (accession number or url), None if missing/expired."""
+        digest = self._lookup(key)
+        if digest is None:
+            return None
+        try:
+            with gzip.open(self._path(digest, ".gz"), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, keys, content, ttl=None):
+        """Store content once under its sha256 and point every key in `keys` to it."""
+        if isinstance(keys, str):
+            keys = [keys]
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        digest = hashlib.sha256(content).hexdigest()
+        path = self._path(digest, ".gz")
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with gzip.open(tmp, "wb", compresslevel=6) as f:
+                f.write(content)
+            os.replace(tmp, path)  # atomic, concurrent writers of the same content are harmless
+        expires = time.time() + ttl if ttl is not None else None
+        with self._connect() as con:
+            con.execute(
+                "INSERT INTO objects (digest, size, last_access) VALUES (?, ?, ?) "
+                "ON CONFLICT(digest) DO UPDATE SET last_access = excluded.last_access",
+                (digest, os.path.getsize(path), time.time()),
+            )
+            con.executemany(
+                "INSERT OR REPLACE INTO keys (key, digest, expires) VALUES (?, ?, ?)",
+                [(k, digest, expires) for k in keys],
+            )
+        self.evict()
+        return digest
+
+    # --- parsed copy
+    def get_parsed(self, key):
+        """Parsed DataFrame for key, None if the filing (or its parsed copy) is not cached."""
+        digest = self._lookup(key)
+        if digest is None:
+            return None
+        try:
+            return pd.read_pickle(self._path(digest, ".parsed.pkl.gz"), compression="gzip")
+        except FileNotFoundError:
+            return None
+
+    def put_filing(self, accession, url, content, parsed=None):
+        """Store a downloaded filing under its accession number and url, plus its parsed table."""
+        digest = self.put([accession, url], content)
+        if parsed is not None:
+            path = self._path(digest, ".parsed.pkl.gz")
+            tmp = f"{path}.{os.getpid()}.tmp"
+            parsed.to_pickle(tmp, compression="gzip")  # keeps the int64/categorical dtypes
+            os.replace(tmp, path)
+            with self._connect() as con:
+                con.execute("UPDATE objects SET parsed_size = ? WHERE digest = ?",
+                            (os.path.getsize(path), digest))
+        return digest
+
+    # --- urls with time to live (ticker map)
+    def fetch(self, url, download, ttl=None):
+        """
+        Cached bytes for url; calls download() when missing or expired.
+        download must return the bytes of a successful response and raise otherwise (error pages are never cached).
+        """
+        content = self.get(url)
+        if content is None:
+            content = download()
+            self.put(url, content, ttl=ttl)
+        return content
+
+    def fetch_json(self, url, download, ttl=TICKER_TTL):
+        return json.load(io.BytesIO(self.fetch(url, download, ttl=ttl)))
+
+    # --- size based LRU eviction
+    def evict(self):
+        with self._connect() as con:
+            total = con.execute("SELECT COALESCE(SUM(size + parsed_size), 0) FROM objects").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            for digest, size in con.execute(
+                "SELECT digest, size + parsed_size FROM objects ORDER BY last_access"
+            ).fetchall():
+                if total <= self.max_bytes:
+                    break
+                for suffix in (".gz", ".parsed.pkl.gz"):
+                    try:
+                        os.remove(self._path(digest, suffix))
+                    except FileNotFoundError:
+                        pass
+                con.execute("DELETE FROM keys WHERE digest = ?", (digest,))
+                con.execute("DELETE FROM objects WHERE digest = ?", (digest,))
+                total -= size
@@ -0,0 +1,155 @@
+import os
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+# SEC fair access policy: max. 10 requests per second per user, stay a bit below it
+SEC_MAX_REQUESTS_PER_SECOND = 8
+# Status codes worth another try (throttling + temporary server problems)
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class RateLimiter:
+    """
+    Spaces requests evenly so that at most `max_per_second` leave this limiter.
+    By default it is shared between threads. For a process pool pass a multiprocessing
+    Lock and Value('d') so every worker process draws from the same budget.
+    """
+
+    def __init__(self, max_per_second=SEC_MAX_REQUESTS_PER_SECOND, lock=None, next_slot=None):
+        self.interval = 1.0 / max_per_second
+        self._lock = lock if lock is not None else threading.Lock()
+        self._next_slot = next_slot  # shared float (time.time() based) or None for in-process use
+        self._local_next = 0.0
+
+    def _get_next(self):
+        return self._next_slot.value if self._next_slot is not None else self._local_next
+
+    def _set_next(self, value):
+        if self._next_slot is not None:
+            self._next_slot.value = value
+        else:
+            self._local_next = value
+
+    def wait(self):
+        # Reserve the next free slot under the lock, sleep outside of it
+        with self._lock:
+            now = time.time()
+            slot = max(now, self._get_next())
+            self._set_next(slot + self.interval)
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+def make_session(headers, pool_size=8):
+    """One requests.Session with a connection pool large enough for all worker threads."""
+    session = requests.Session()
+    session.headers.update(headers)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _rebase(url, base_url):
+    # Point an EDGAR url to another host (e.g. a local stand-in) while keeping the path
+    if not base_url:
+        return url
+    base = urlsplit(base_url)
+    parts = urlsplit(url)
+    return urlunsplit((base.scheme, base.netloc, base.path.rstrip("/") + parts.path, parts.query, ""))
+
+
+def fetch_with_retry(session, url, limiter, retries=5, backoff=0.5, timeout=30):
+    """
+    GET one url through the rate limiter.
+    Throttling/server errors and connection problems are retried with exponential backoff
+    (plus jitter, Retry-After is respected). Returns the raw bytes.
+    """
+    for attempt in range(retries + 1):
+        limiter.wait()
+        try:
+            response = session.get(url, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == retries:
+                raise
+            time.sleep(backoff * 2 ** attempt + random.uniform(0, backoff))
+            continue
+
+        if response.status_code in RETRY_STATUS and attempt < retries:
+            retry_after = response.headers.get("Retry-After")
+            wait = float(retry_after) if retry_after and retry_after.isdigit() else backoff * 2 ** attempt
+            time.sleep(wait + random.uniform(0, backoff))
+            continue
+        response.raise_for_status()
+        return response.content
+    raise RuntimeError(f"Giving up on {url}")  # not reached, loop either returns or raises
+
+
+def _timed_fetch(session, url, limiter, retries):
+    # Latency of one attachment as seen by the pipeline (rate limiter waits and retries included)
+    start = time.perf_counter()
+    content = fetch_with_retry(session, url, limiter, retries)
+    return content, time.perf_counter() - start
+
+
+def download_attachments(jobs, headers, max_workers=8, max_per_second=SEC_MAX_REQUESTS_PER_SECOND,
+                         limiter=None, base_url=None, retries=5, metrics=None):
+    """
+    Fetch many filing attachments concurrently over one pooled session.
+    - jobs: iterable of (key, url), e.g. (accession_number, attachment url)
+    - yields (key, bytes) in completion order, so parsing can start while other downloads run
+    - the first failed download raises, the downloads not started yet are cancelled
+    - base_url: optional host replacement (recorded filings served locally, see serve_recorded_filings)
+    - metrics: optional instrumentation.Metrics, one "download" record (seconds, bytes) per attachment
+    """
+    jobs = list(jobs)
+    if not jobs:
+        return
+    limiter = limiter or RateLimiter(max_per_second)
+    session = make_session(headers, pool_size=max_workers)
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {
+                pool.submit(_timed_fetch, session, _rebase(url, base_url), limiter, retries): key
+                for key, url in jobs
+            }
+            try:
+                for future in as_completed(futures):
+                    content, seconds = future.result()
+                    if metrics is not None:
+                        metrics.record("download", seconds, accession=futures[future], bytes=len(content))
+                    yield futures[future], content
+            finally:
+                # a failed download (or a consumer that stops early) cancels the queued requests,
+                # the pool then only waits for the ones already running
+                for future in futures:
+                    future.cancel()
+    finally:
+        session.close()
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):  # no access log line per request on stderr
+        pass
+
+
+def serve_recorded_filings(folder, port=0):
+    """
+    Serve recorded EDGAR files from `folder` over local HTTP (stand-in for www.sec.gov).
+    Files are stored under their EDGAR path, e.g. folder/Archives/edgar/data/<cik>/<acc>/infotable.xml.
+    Returns the running server; use f"http://127.0.0.1:{server.server_port}" as base_url.
+    """
+    handler = partial(_QuietHandler, directory=os.fspath(folder))
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,300 @@
+import os
+import json
+import time
+import logging
+import pandas as pd
+import edgar as ed
+from infotable_parser import parse_infotable_xml
+from edgar_download import RateLimiter, download_attachments, fetch_with_retry, make_session
+from edgar_cache import EdgarCache, TICKER_TTL
+from columnar_io import read_holdings, write_holdings
+from amendments import get_resolver, apply_amendment, queue_for_review
+from instrumentation import Metrics, log_frame
+
+logger = logging.getLogger(__name__)
+
+# Folder (next to the output file) for amendments the resolver cannot decide automatically
+REVIEW_DIR_NAME = "main_or_attachment"
+UPPER_THRESHOLD = 0.8
+LOWER_THRESHOLD = 0.2
+# Before 2022 Q4 the SEC reported values in thousands
+VALUE_CUTOFF = pd.Timestamp(2022, 10, 1)  # start of Q4 2022
+
+
+def _download_ticker_map(url, headers, limiter=None):
+    # Retries throttling/server errors, raises on any other error status:
+    # a 403 (User-Agent policy) or 5xx page never reaches the cache
+    with make_session(headers, pool_size=1) as session:
+        return fetch_with_retry(session, url, limiter or RateLimiter())
+
+
+# Find from ticker the matching CIK number
+def ticker_matching_cik(ticker, headers=None, cache=None, limiter=None):
+    if headers is None:
+        user_email = input("Enter your email address for SEC requests: ")
+        headers = {"User-Agent": user_email}
+    ticker = ticker.upper().replace(".", "-")
+    url = "https://www.sec.gov/files/company_tickers.json"
+    if cache is None:
+        cache = EdgarCache()
+    # The ticker map is kept on disk and only downloaded again after TICKER_TTL
+    data = cache.fetch_json(url, lambda: _download_ticker_map(url, headers, limiter), ttl=TICKER_TTL)
+    for row in data.values():
+        if ticker == row["ticker"]:
+            company_name = row['title']
+            cik = str(row['cik_str']).zfill(10)
+            return cik, company_name
+    return None, None
+
+
+def load_13f_metadata(cik, begin_date, limiter=None, metrics=None):
+    """
+    Filing metadata of all 13F-HR (+ amendments) of a CIK with reportDate >= begin_date.
+    Returns the metadata sorted newest reportDate first (oldest filing first within a period)
+    and a lookup accession number -> Filing object.
+    limiter: optional RateLimiter shared with other filers/processes (the EDGAR metadata requests count too).
+    metrics: optional Metrics, stages "get_filings" and "to_pandas" (EDGAR metadata).
+    """
+    metrics = metrics if metrics is not None else Metrics()
+    limiter = limiter or RateLimiter()
+    with metrics.stage("get_filings"):
+        limiter.wait()
+        company_filings = ed.Company(cik)
+        limiter.wait()
+        subset_company_filings = company_filings.get_filings(form="13F-HR")  # Subset to 13F Filings
+
+    with metrics.stage("to_pandas") as counters:
+        # Subset the company filings until the desired Date
+        begin_date = pd.to_datetime(begin_date)
+        all_meta_df = subset_company_filings.to_pandas()
+        all_meta_df["reportDate"] = pd.to_datetime(all_meta_df["reportDate"])
+        df = all_meta_df[all_meta_df["reportDate"] >= begin_date].copy()
+
+        allowed_accs = set(df["accession_number"])
+        latest_13fs_subset = [f for f in subset_company_filings if f.accession_no in allowed_accs]
+        latest_13fs_number = len(latest_13fs_subset)
+
+        latest_13fs = subset_company_filings.latest(n=latest_13fs_number)
+        # filings metadata to pandas for sorting
+        pd.set_option("display.max_columns", None)
+        df = latest_13fs.to_pandas()  # data frame so the filing_date can be simply extracted
+
+        # Normalize datatypes and sort: newest reportDate first; within each period, oldest filing first
+        df["reportDate"] = pd.to_datetime(df["reportDate"])
+        df.sort_values(["reportDate", "filing_date"], ascending=[False, True], inplace=True)
+        counters["rows"] = len(df)
+    logger.debug("13F filings of %s:\n%s", cik, df)
+
+    # Build a lookup so we can get the right Filing object by accession number
+    # Fixes the mismatch between the sorted df and the unsorted latest_13fs list
+    acc_to_filing = {f.accession_no: f for f in latest_13fs}
+    logger.debug("accession number -> filing: %s", acc_to_filing)
+    return df, acc_to_filing
+
+
+def fetch_parsed_tables(accessions, acc_to_filing, user_email, cache=None, limiter=None, metrics=None):
+    """
+    Holdings table for every accession number.
+    Filings already in the local cache (edgar_cache.py) skip download and parsing completely,
+    the rest is downloaded concurrently (edgar_download.py) and parsed as soon as it arrives.
+    limiter: optional RateLimiter shared with other filers/processes.
+    metrics: optional Metrics, per filing "download" (seconds, bytes) and "parse" (seconds, rows),
+    "cache_lookup" with the number of cache hits.
+    """
+    cache = cache if cache is not None else EdgarCache()
+    metrics = metrics if metrics is not None else Metrics()
+    limiter = limiter or RateLimiter()
+    parsed_tables = {}
+    jobs = []
+    with metrics.stage("cache_lookup") as counters:
+        for acc in accessions:
+            cached = cache.get_parsed(acc)
+            if cached is not None:
+                parsed_tables[acc] = cached
+            else:
+                # the data is stored in xml files inside attachments[2] of each filing
+                # (the attachment list is one more request to EDGAR)
+                limiter.wait()
+                jobs.append((acc, acc_to_filing[acc].attachments[2].url))
+        counters.update(hits=len(parsed_tables), rows=sum(len(t) for t in parsed_tables.values()))
+    urls = dict(jobs)
+    for acc, file_html_code in download_attachments(jobs, headers={"User-Agent": user_email}, limiter=limiter,
+                                                    metrics=metrics):
+        start = time.perf_counter()
+        parsed_tables[acc] = parse_infotable_xml(file_html_code)
+        metrics.record("parse", time.perf_counter() - start, accession=acc, bytes=len(file_html_code),
+                       rows=len(parsed_tables[acc]))
+        cache.put_filing(acc, urls[acc], file_html_code, parsed=parsed_tables[acc])
+    return parsed_tables
+
+
+def resolve_period(same_date_df, parsed_tables, report_date, base_name, review_dir=REVIEW_DIR_NAME,
+                   upper_threshold=UPPER_THRESHOLD, lower_threshold=LOWER_THRESHOLD, resolver="cusip",
+                   metrics=None):
+    """
+    Holdings of one reportDate from its filings (oldest filing first):
+        - the first filing is the provisional main filing
+        - every later filing (13F-HR/A) is classified against the current main by the resolver
+          (amendments.py: replacement, patch, restatement or conflict) and applied to it
+        - conflicts do not change the main and are added to the review queue in review_dir
+    metrics: optional Metrics, one "amendment" record (seconds, kind) per 13F-HR/A.
+    """
+    resolver = get_resolver(resolver)
+    main_dataframe = pd.DataFrame()  # the "replacement"/main filing for this period
+
+    for w, acc in enumerate(same_date_df["accession_number"]):
+        # Holdings rows of this filing (already downloaded and parsed)
+        data_frame = parsed_tables[acc]
+        # shows how the data look like in the data frame we created from the XML (log level DEBUG)
+        log_frame(logger, f"filing {w} of {report_date:%Y-%m-%d}: {acc}", data_frame)
+
+        # Keep the period metadata on these rows (report date from the group anchor)
+        data_frame["report_dates"] = report_date  # assign the filling_date to the whole file
+
+        # Before 2022 Q4 the SEC reported values in thousands, so multiply *1000 the values before that point.
+        if report_date < VALUE_CUTOFF:
+            data_frame["Value"] = data_frame["Value"] * 1000
+
+        if w == 0:
+            # The first file is treated as the provisional "main" (until a replacement appears)
+            main_dataframe = data_frame
+            continue
+
+        # Decide replacement vs. patch vs. restatement vs. conflict for this amendment
+        start = time.perf_counter()
+        decision = resolver(main_dataframe, data_frame, upper_threshold, lower_threshold)
+        logger.info("[amendment] %s: %s (%s)", acc, decision["kind"], decision["reason"])
+        if decision["kind"] == "conflict":
+            out_path = queue_for_review(review_dir, base_name, report_date, acc, data_frame, decision)
+            logger.warning("[review] queued: %s", out_path)
+        main_dataframe = apply_amendment(main_dataframe, data_frame, decision)
+        if metrics is not None:
+            metrics.record("amendment", time.perf_counter() - start, accession=acc, kind=decision["kind"],
+                           rows=len(data_frame))
+
+    return main_dataframe
+
+
+def combine_filings(df, parsed_tables, base_name, review_dir=REVIEW_DIR_NAME,
+                    upper_threshold=UPPER_THRESHOLD, lower_threshold=LOWER_THRESHOLD, resolver="cusip",
+                    metrics=None):
+    """
+    For each reportDate in the sorted metadata df:
+        - decide if later filings (13F-HR/A) replace the original report (13F-HR), add holdings (patch)
+          or restate single positions (resolver="cusip": CUSIP-level diff, "row_count": original
+          row-count thresholds >=80% = replacement, <=20% = patch).
+        - true conflicts are written to the review queue (review_dir/review_queue.jsonl).
+    The filings are grouped by reportDate once (no re-filtering of df per period) and the periods are
+    concatenated once at the end, so the cost grows linearly with the length of the history.
+    Returns all reportDates concatenated (newest first).
+    """
+    periods = []  # one combined holdings table per reportDate
+    # groupby(sort=False) keeps the order of df: newest reportDate first, oldest filing first inside
+    for report_date, same_date_df in df.groupby("reportDate", sort=False):
+        periods.append(resolve_period(
+            same_date_df, parsed_tables, pd.Timestamp(report_date), base_name, review_dir,
+            upper_threshold, lower_threshold, resolver, metrics,
+        ))
+    if not periods:
+        return pd.DataFrame()
+    # Accumulate across all periods in one step
+    return pd.concat(periods, ignore_index=True)
+
+
+def manifest_path(full_path):
+    # berkshire.csv -> berkshire.state.json (not picked up by the "*.csv"/"*.parquet" glob of the star schema)
+    return os.path.splitext(full_path)[0] + ".state.json"
+
+
+def read_manifest(full_path):
+    """Accession numbers/reportDates already contained in the output, None if there is no manifest."""
+    try:
+        with open(manifest_path(full_path), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_manifest(full_path, cik, accession_numbers, report_dates):
+    state = {
+        "cik": cik,
+        "accession_numbers": sorted(accession_numbers),
+        "report_dates": sorted({pd.Timestamp(d).strftime("%Y-%m-%d") for d in report_dates}),
+        "updated": pd.Timestamp.now().isoformat(timespec="seconds"),
+    }
+    tmp = manifest_path(full_path) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=1)
+    os.replace(tmp, manifest_path(full_path))
+
+
+def update_13f_csv(user_email, cik, full_path, begin_date, incremental=False,
+                   review_dir=None, cache=None, limiter=None, resolver="cusip", metrics=None):
+    """
+    Download, combine and write the 13F holdings of one CIK to full_path
+    (CSV, or Parquet with explicit column types if full_path ends with .parquet).
+    incremental=True:
+        - reads the existing output and its state manifest (<name>.state.json)
+        - only filings whose accession number was not processed before are new
+        - every reportDate touched by a new filing (new quarter or new 13F-HR/A) is recomputed
+          with all of its filings, so the replacement/patch decision sees the whole period
+        - the recomputed periods replace the old rows for these dates (upsert), the rest is kept
+    Without a manifest, all filings of reportDates already present in the output count as processed.
+    review_dir: review queue for conflicting amendments, default <output folder>/main_or_attachment.
+    limiter: optional RateLimiter for every EDGAR request (metadata, attachment lists, downloads).
+    metrics: optional instrumentation.Metrics; records the stages get_filings, to_pandas, read_existing,
+    cache_lookup, download/parse (per filing), combine (+ amendment per 13F-HR/A) and write.
+    """
+    metrics = metrics if metrics is not None else Metrics()
+    ed.set_identity(user_email)  # Send the identity to the Server of the SEC
+    base_name = os.path.splitext(os.path.basename(full_path))[0]  # Used later for name ambiguous file
+    if review_dir is None:
+        review_dir = os.path.join(os.path.dirname(os.path.abspath(full_path)), REVIEW_DIR_NAME)
+    df, acc_to_filing = load_13f_metadata(cik, begin_date, limiter=limiter, metrics=metrics)
+    all_accessions = set(df["accession_number"])
+
+    existing = None
+    affected_dates = set(df["reportDate"])
+    if incremental and os.path.exists(full_path):
+        with metrics.stage("read_existing", bytes=os.path.getsize(full_path)) as counters:
+            existing = read_holdings(full_path)
+            counters["rows"] = len(existing)
+        state = read_manifest(full_path)
+        if state is None:
+            done_dates = set(existing["report_dates"].dropna())
+            seen = set(df.loc[df["reportDate"].isin(done_dates), "accession_number"])
+        else:
+            seen = set(state["accession_numbers"])
+
+        new_filings = df[~df["accession_number"].isin(seen)]
+        if new_filings.empty:
+            logger.info("[incremental] %s: no new filings", base_name)
+            write_manifest(full_path, cik, seen | all_accessions, existing["report_dates"].dropna())
+            return existing
+        affected_dates = set(new_filings["reportDate"])
+        df = df[df["reportDate"].isin(affected_dates)]
+        all_accessions |= seen
+        logger.info("[incremental] %s: %d new filings, %d reportDates to recompute",
+                    base_name, len(new_filings), len(affected_dates))
+
+    parsed_tables = fetch_parsed_tables(df["accession_number"], acc_to_filing, user_email,
+                                        cache=cache, limiter=limiter, metrics=metrics)
+    with metrics.stage("combine", filings=len(df)) as counters:
+        final_dataframe = combine_filings(df, parsed_tables, base_name, review_dir=review_dir,
+                                          resolver=resolver, metrics=metrics)
+
+        if existing is not None:
+            # Upsert: drop the recomputed periods from the old output, keep newest reportDate first
+            kept = existing[~existing["report_dates"].isin(affected_dates)]
+            final_dataframe = pd.concat([final_dataframe, kept], ignore_index=True)
+            final_dataframe = final_dataframe.sort_values(
+                "report_dates", ascending=False, kind="stable"
+            ).reset_index(drop=True)
+        counters["rows"] = len(final_dataframe)
+
+    with metrics.stage("write", rows=len(final_dataframe)) as counters:
+        write_holdings(final_dataframe, full_path)  # CSV, or Parquet for *.parquet (columnar_io.py)
+        counters["bytes"] = os.path.getsize(full_path)
+    report_dates = final_dataframe["report_dates"].dropna() if "report_dates" in final_dataframe else []
+    write_manifest(full_path, cik, all_accessions, report_dates)
+    return final_dataframe
@@ -0,0 +1,117 @@
+import io
+import numpy as np
+import pandas as pd
+from lxml import etree
+from bs4 import BeautifulSoup
+
+
+# Columns of one parsed information table (same names as the original BeautifulSoup rows)
+INFOTABLE_COLUMNS = ["Company", "Class", "CUSIP", "Value", "Shares", "SharesType", "Discretion"]
+
+# Only a handful of distinct values exist (SH/PRN and SOLE/DFND/OTR), so categoricals keep them tiny
+CATEGORICAL_COLUMNS = ["SharesType", "Discretion"]
+
+
+def _local(tag):
+    # "{http://www.sec.gov/edgar/document/thirteenf/informationtable}cusip" -> "cusip"
+    return tag.rsplit("}", 1)[-1] if isinstance(tag, str) else ""
+
+
+def _int_column(values, mask):
+    # Plain int64 if every row had the field, otherwise nullable Int64 (missing stays missing)
+    if mask.any():
+        return pd.arrays.IntegerArray(values, mask)
+    return values
+
+
+def parse_infotable_xml(xml_content) -> pd.DataFrame:
+    """
+    Stream the <infoTable> elements of a 13F information table one at a time.
+    - every element is read once, its fields are written directly into column buffers
+      (int64 for Value/Shares) and the element is freed before the next one is parsed.
+    - returns the same columns as the BeautifulSoup rows (Company, Class, CUSIP, Value,
+      Shares, SharesType, Discretion), SharesType/Discretion as categoricals.
+    """
+    if isinstance(xml_content, str):
+        # lxml refuses unicode input that carries an encoding declaration
+        xml_content = xml_content.encode("utf-8")
+
+    company, klass, cusip, shares_type, discretion = [], [], [], [], []
+    value, shares = [], []
+    value_missing, shares_missing = [], []
+
+    context = etree.iterparse(
+        io.BytesIO(xml_content), events=("end",), tag="{*}infoTable", recover=True, huge_tree=True
+    )
+    for _, info in context:
+        fields = {}
+        amount = None
+        amount_type = None
+        for child in info:
+            name = _local(child.tag)
+            if name == "shrsOrPrnAmt":
+                for sub in child:
+                    sub_name = _local(sub.tag)
+                    if sub_name == "sshPrnamt":
+                        amount = sub.text
+                    elif sub_name == "sshPrnamtType":
+                        amount_type = sub.text
+                fields[name] = True
+            else:
+                fields[name] = child.text
+
+        company.append(fields.get("nameOfIssuer"))
+        klass.append(fields.get("titleOfClass"))
+        cusip.append(fields.get("cusip"))
+        discretion.append(fields.get("investmentDiscretion"))
+
+        raw_value = fields.get("value")
+        value_missing.append(raw_value is None)
+        value.append(int(raw_value) if raw_value is not None else 0)
+
+        has_amount = "shrsOrPrnAmt" in fields
+        shares_missing.append(not has_amount or amount is None)
+        shares.append(int(amount) if has_amount and amount is not None else 0)
+        shares_type.append(amount_type if has_amount else None)
+
+        # Free the element (and already processed siblings) so memory stays flat on big filers
+        info.clear()
+        while info.getprevious() is not None:
+            del info.getparent()[0]
+    del context
+
+    data_frame = pd.DataFrame({
+        "Company": company,
+        "Class": klass,
+        "CUSIP": cusip,
+        "Value": _int_column(np.asarray(value, dtype=np.int64), np.asarray(value_missing, dtype=bool)),
+        "Shares": _int_column(np.asarray(shares, dtype=np.int64), np.asarray(shares_missing, dtype=bool)),
+        "SharesType": shares_type,
+        "Discretion": discretion,
+    }, columns=INFOTABLE_COLUMNS)
+    for col in CATEGORICAL_COLUMNS:
+        data_frame[col] = data_frame[col].astype("category")
+    return data_frame
+
+
+def parse_infotable_bs4(xml_content) -> pd.DataFrame:
+    """
+    Original BeautifulSoup parser (full tree + find() per field).
+    Kept as reference implementation for the benchmark and for cross-checks.
+    """
+    soup = BeautifulSoup(xml_content, "xml")
+    rows = []
+    for info in soup.find_all("infoTable"):
+        row = {
+            "Company": info.find("nameOfIssuer").text if info.find("nameOfIssuer") else None,
+            "Class": info.find("titleOfClass").text if info.find("titleOfClass") else None,
+            "CUSIP": info.find("cusip").text if info.find("cusip") else None,
+            "Value": int(info.find("value").text) if info.find("value") else None,
+            "Shares": int(info.find("shrsOrPrnAmt").find("sshPrnamt").text) if info.find(
+                "shrsOrPrnAmt") else None,
+            "SharesType": info.find("shrsOrPrnAmt").find("sshPrnamtType").text if info.find(
+                "shrsOrPrnAmt") else None,
+            "Discretion": info.find("investmentDiscretion").text if info.find("investmentDiscretion") else None,
+        }
+        rows.append(row)
+    return pd.DataFrame(rows)
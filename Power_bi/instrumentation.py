@@ -0,0 +1,120 @@
+import io
+import json
+import time
+import logging
+import cProfile
+import pstats
+import threading
+import contextlib
+import pandas as pd
+
+# Instrumentation of the 13F pipeline (holdings_13f.update_13f_csv, batch_13f.py):
+#   - Metrics: wall time of every stage (EDGAR metadata, downloads, parsing, amendment decisions, write),
+#     bytes downloaded, rows parsed and one record per filing (download / parse latency)
+#     -> JSON lines (jsonl_path, one record per line as it happens) and/or summary() table
+#   - configure_logging: log level instead of the former debug prints (DEBUG shows the per-filing frames)
+#   - profiled: optional cProfile around a run (.prof file + top functions in the log)
+# Example:
+#   metrics = Metrics(run="berkshire", jsonl_path="metrics.jsonl")
+#   with profiled("berkshire.prof"):
+#       update_13f_csv(email, cik, path, "2013-01-01", metrics=metrics)
+#   print(metrics.summary())
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+SUMMARY_COLUMNS = ["calls", "seconds", "mean_seconds", "max_seconds", "rows", "bytes"]
+
+logger = logging.getLogger(__name__)
+
+
+def configure_logging(level="INFO"):
+    """Log level for the pipeline messages (DEBUG = per-filing frames, INFO = progress, WARNING = quiet)."""
+    if isinstance(level, str):
+        level = getattr(logging, level.upper())
+    logging.basicConfig(level=level, format=LOG_FORMAT)
+    logging.getLogger().setLevel(level)
+
+
+def log_frame(log, title, df, level=logging.DEBUG):
+    """Log head() and info() of a DataFrame; nothing is formatted unless the level is enabled."""
+    if not log.isEnabledFor(level):
+        return
+    buffer = io.StringIO()
+    df.info(buf=buffer)
+    log.log(level, "%s\n%s\n%s", title, df.head(), buffer.getvalue())
+
+
+def summarize_records(records):
+    """Per stage (in order of first appearance): calls, total/mean/max seconds, rows and bytes."""
+    df = pd.DataFrame(records)
+    if df.empty:
+        return pd.DataFrame(columns=SUMMARY_COLUMNS)
+    for col in ("rows", "bytes"):
+        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0).astype("int64") if col in df else 0
+    return df.groupby("stage", sort=False).agg(
+        calls=("seconds", "size"),
+        seconds=("seconds", "sum"),
+        mean_seconds=("seconds", "mean"),
+        max_seconds=("seconds", "max"),
+        rows=("rows", "sum"),
+        bytes=("bytes", "sum"),
+    )
+
+
+class Metrics:
+    """
+    Collects timing/volume records of one run (thread-safe, downloads record from worker threads).
+    Every record: run, stage, seconds + free fields (rows, bytes, accession, ...).
+    jsonl_path: append every record to this file as it is recorded.
+    """
+
+    def __init__(self, run=None, jsonl_path=None):
+        self.run = run
+        self.jsonl_path = jsonl_path
+        self.records = []
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds=None, **fields):
+        rec = {"run": self.run, "stage": stage, "seconds": seconds, **fields}
+        with self._lock:
+            self.records.append(rec)
+            if self.jsonl_path:
+                with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(rec, default=str) + "\n")
+        logger.debug("%s %.3f s %s", stage, seconds or 0.0, fields)
+        return rec
+
+    @contextlib.contextmanager
+    def stage(self, name, **fields):
+        """Time a block; the yielded dict takes counters (rows, bytes, ...) filled in inside the block."""
+        counters = dict(fields)
+        start = time.perf_counter()
+        try:
+            yield counters
+        finally:
+            self.record(name, time.perf_counter() - start, **counters)
+
+    def to_frame(self):
+        return pd.DataFrame(self.records)
+
+    def summary(self):
+        return summarize_records(self.records)
+
+
+@contextlib.contextmanager
+def profiled(output_path=None, sort="cumulative", limit=25):
+    """
+    cProfile around a block. output_path: stats file (.prof, for pstats/snakeviz);
+    the top `limit` functions are logged at INFO.
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        if output_path:
+            profiler.dump_stats(output_path)
+        if logger.isEnabledFor(logging.INFO):
+            buffer = io.StringIO()
+            pstats.Stats(profiler, stream=buffer).sort_stats(sort).print_stats(limit)
+            logger.info("profile (%s)\n%s", output_path or "not saved", buffer.getvalue())
@@ -0,0 +1,140 @@
+import os
+import shutil
+import numpy as np
+import pandas as pd
+
+# Inverted ownership index: SecurityKey -> DateKey -> holders (FirmKey, Shares, Value).
+# One folder per quarter, each a CSR layout of plain .npy arrays (memory-mapped when read):
+#   OwnershipIndex/<DateKey>/securities.npy  sorted SecurityKeys (fixed-width strings)
+#                            offsets.npy     int64, holders of securities[i] are rows offsets[i]:offsets[i+1]
+#                            firm_keys.npy   int32 \
+#                            shares.npy      int64  } one row per holder, largest Value first
+#                            values.npy      int64 /
+# A new or changed quarter only rewrites its own folder.
+
+INDEX_DIR = "OwnershipIndex"
+ARRAYS = ("securities", "offsets", "firm_keys", "shares", "values")
+
+
+def _write_quarter(rows, folder):
+    """CSR arrays for the fact rows of one quarter (written to a temp folder, then swapped in)."""
+    # plain strings before sorting: categorical keys would sort by category order, not lexically
+    rows = rows.assign(SecurityKey=rows["SecurityKey"].astype(str))
+    rows = rows.sort_values(["SecurityKey", "Value"], ascending=[True, False], kind="stable")
+    keys = rows["SecurityKey"].to_numpy(dtype=str)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.array([], dtype=np.int64)
+    arrays = {
+        "securities": np.asarray(keys[starts], dtype=str),
+        "offsets": np.r_[starts, len(keys)].astype(np.int64),
+        "firm_keys": rows["FirmKey"].to_numpy(dtype=np.int32),
+        "shares": rows["Shares"].fillna(0).to_numpy(dtype=np.int64),
+        "values": rows["Value"].fillna(0).to_numpy(dtype=np.int64),
+    }
+    tmp = folder + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    for name, arr in arrays.items():
+        np.save(os.path.join(tmp, f"{name}.npy"), arr)
+    shutil.rmtree(folder, ignore_errors=True)
+    os.replace(tmp, folder)
+
+
+def build_ownership_index(fact, output_folder, date_keys=None):
+    """
+    Write the index for Fact_HoldingSnapshot rows into <output_folder>/OwnershipIndex.
+    date_keys: only rebuild these quarters (incremental refresh); quarters without rows are removed.
+    Without date_keys the whole index is rebuilt.
+    """
+    index_folder = os.path.join(output_folder, INDEX_DIR)
+    if date_keys is None:
+        shutil.rmtree(index_folder, ignore_errors=True)
+        date_keys = fact["DateKey"].dropna().unique()
+    os.makedirs(index_folder, exist_ok=True)
+    date_keys = {int(k) for k in date_keys}
+    fact = fact[fact["DateKey"].isin(date_keys)]
+    written = set()
+    for date_key, rows in fact.groupby("DateKey", sort=True):
+        _write_quarter(rows, os.path.join(index_folder, str(int(date_key))))
+        written.add(int(date_key))
+    for date_key in date_keys - written:
+        shutil.rmtree(os.path.join(index_folder, str(date_key)), ignore_errors=True)
+    return sorted(written)
+
+
+class OwnershipIndex:
+    """
+    Read side of the index. Arrays are memory-mapped on first use, a lookup is a binary search
+    on the sorted SecurityKeys of a quarter, so nothing like the fact table is loaded.
+    """
+
+    def __init__(self, output_folder):
+        self.folder = os.path.join(output_folder, INDEX_DIR)
+        self._quarters = {}
+
+    def quarters(self):
+        """DateKeys contained in the index (ascending)."""
+        if not os.path.isdir(self.folder):
+            return []
+        return sorted(int(name) for name in os.listdir(self.folder) if name.isdigit())
+
+    def _arrays(self, date_key):
+        date_key = int(date_key)
+        if date_key not in self._quarters:
+            folder = os.path.join(self.folder, str(date_key))
+            if not os.path.isdir(folder):
+                return None
+            self._quarters[date_key] = {
+                name: np.load(os.path.join(folder, f"{name}.npy"), mmap_mode="r") for name in ARRAYS
+            }
+        return self._quarters[date_key]
+
+    def _slice(self, security_key, date_key):
+        arrays = self._arrays(date_key)
+        if arrays is None:
+            return None, slice(0, 0)
+        securities = arrays["securities"]
+        i = np.searchsorted(securities, str(security_key))
+        if i == len(securities) or securities[i] != str(security_key):
+            return arrays, slice(0, 0)
+        return arrays, slice(int(arrays["offsets"][i]), int(arrays["offsets"][i + 1]))
+
+    def holders(self, security_key, date_key):
+        """Firms holding the security in the quarter: FirmKey, Shares, Value (largest Value first)."""
+        arrays, rows = self._slice(security_key, date_key)
+        if arrays is None:
+            return pd.DataFrame(columns=["FirmKey", "Shares", "Value"])
+        return pd.DataFrame({
+            "FirmKey": np.asarray(arrays["firm_keys"][rows]),
+            "Shares": np.asarray(arrays["shares"][rows]),
+            "Value": np.asarray(arrays["values"][rows]),
+        })
+
+    def history(self, security_key, date_keys=None):
+        """Holders of the security in every quarter (DateKey, FirmKey, Shares, Value)."""
+        frames = [
+            self.holders(security_key, k).assign(DateKey=k)
+            for k in (date_keys if date_keys is not None else self.quarters())
+        ]
+        frames = [f for f in frames if len(f)]
+        if not frames:
+            return pd.DataFrame(columns=["DateKey", "FirmKey", "Shares", "Value"])
+        return pd.concat(frames, ignore_index=True)[["DateKey", "FirmKey", "Shares", "Value"]]
+
+    def concentration(self, security_key, date_key, top=5):
+        """
+        Ownership concentration of one security in one quarter:
+        number of holders, total shares/value, value share of the top holders and the
+        Herfindahl index of the value shares (1 = a single holder).
+        """
+        h = self.holders(security_key, date_key)
+        total_value = float(h["Value"].sum())
+        weights = h["Value"] / total_value if total_value else h["Value"] * 0.0
+        return {
+            "SecurityKey": str(security_key),
+            "DateKey": int(date_key),
+            "Holders": len(h),
+            "TotalShares": int(h["Shares"].sum()),
+            "TotalValue": int(total_value),
+            f"Top{top}ValueShare": float(weights.iloc[:top].sum()),
+            "HHI": float((weights ** 2).sum()),
+        }
@@ -0,0 +1,277 @@
+import os
+import glob
+import json
+import hashlib
+import logging
+import pandas as pd
+from Raw_data_to_star_schema import (
+    load_firm_files, add_date_key, aggregate_holdings, latest_security_attrs,
+    build_dim_security, build_dim_date, build_position_change, write_tables, POSITION_CHANGE_COLUMNS,
+)
+from columnar_io import read_table, read_fact, write_star_schema
+from ownership_index import INDEX_DIR, build_ownership_index
+
+
+# Everything the incremental build needs between runs lives in <output_folder>/_state
+STATE_DIR = "_state"
+REGISTRY_FILE = "key_registry.json"
+SECURITY_STATE_FILE = "security_attrs.pkl.gz"  # latest attributes per CUSIP incl. report_dates
+
+logger = logging.getLogger(__name__)
+
+
+def _sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_registry(output_folder):
+    """
+    Persisted key registry:
+    - firms: FirmName -> FirmKey (never renumbered, new firms get max + 1)
+    - files: FirmName -> {path, mtime, size, sha256, date_keys} of the last processed input file
+    SecurityKey (CUSIP) and DateKey (YYYYMMDD) are natural keys and stable by construction.
+    """
+    path = os.path.join(output_folder, STATE_DIR, REGISTRY_FILE)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"firms": {}, "files": {}}
+
+
+def save_registry(output_folder, registry):
+    folder = os.path.join(output_folder, STATE_DIR)
+    os.makedirs(folder, exist_ok=True)
+    tmp = os.path.join(folder, REGISTRY_FILE + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(registry, f, indent=1)
+    os.replace(tmp, os.path.join(folder, REGISTRY_FILE))
+
+
+def _read_existing(output_folder, name, output_format):
+    # Previously written dimension table, None on the first run
+    path = os.path.join(output_folder, f"{name}.{output_format}")
+    if not os.path.exists(path):
+        return None
+    if output_format == "parquet":
+        return read_table(path)
+    return pd.read_csv(path, dtype={"SecurityKey": str})
+
+
+def _changed_files(files, registry):
+    """Input files that are new or whose content changed (mtime/size first, sha256 to confirm)."""
+    changed = []
+    for path in files:
+        firm_name = os.path.splitext(os.path.basename(path))[0]
+        stat = os.stat(path)
+        known = registry["files"].get(firm_name)
+        if known and known["mtime"] == stat.st_mtime and known["size"] == stat.st_size:
+            continue
+        digest = _sha256(path)
+        if known and known["sha256"] == digest:
+            known.update(mtime=stat.st_mtime, size=stat.st_size, path=path)  # touched, not changed
+            continue
+        changed.append((firm_name, path, stat, digest))
+    return changed
+
+
+def _security_state_from_dim(dim_security):
+    """
+    Security state seeded from a Dim_Security written without state (full build, older output).
+    The report date is unknown, so every attribute from a reloaded file replaces the seeded one.
+    """
+    state = dim_security.loc[:, ["SecurityKey", "IssuerCompanyName", "Class"]].astype(object)
+    state.columns = ["CUSIP", "Company", "Class"]
+    state["CUSIP"] = state["CUSIP"].astype(str)
+    state["report_dates"] = pd.Timestamp.min
+    return state
+
+
+def _first_changed_date_keys(old_rows, new_rows):
+    """FirmKey -> first DateKey whose snapshot rows differ between the old and the reloaded fact rows."""
+    keys = ["FirmKey", "SecurityKey", "DateKey"]
+    cols = keys + ["Shares", "Value"]
+    old_rows = old_rows[cols].astype({"SecurityKey": str, "DateKey": "int64"})
+    new_rows = new_rows[cols].astype({"SecurityKey": str, "DateKey": "int64"})
+    both = old_rows.merge(new_rows, on=keys, how="outer", suffixes=("_old", ""), indicator=True)
+    differs = (
+        both["_merge"].ne("both")
+        | both["Shares"].ne(both["Shares_old"]).fillna(True)
+        | both["Value"].ne(both["Value_old"]).fillna(True)
+    )
+    return both[differs].groupby("FirmKey")["DateKey"].min()
+
+
+def update_starschema(input_glob: str, output_folder: str, output_format: str = "csv",
+                      ownership_index: bool = None):
+    """
+    Incremental version of transform_starschema.
+    - only input files whose mtime/size and sha256 changed are read
+    - FirmKeys come from a persisted registry: existing firms keep their key, new firms are appended
+      (first run: seeded from an existing Dim_Firm, otherwise sorted like the full build)
+    - Dim_Security/Dim_Date are extended with the new securities/dates (latest attributes per CUSIP win)
+    - fact rows of changed (or removed) firms are replaced; with Parquet only the affected YearQuarter
+      partitions are read and rewritten
+    - Fact_PositionChange is only recomputed for changed firms from their first changed quarter on
+      (a newly filed quarter only adds the changes of that quarter)
+    - the ownership index (ownership_index.py) is rewritten for the affected quarters only;
+      ownership_index=None keeps an existing index current, True also builds a missing one, False skips it
+    Returns the number of firms that were (re)loaded.
+    """
+    if output_format not in ("csv", "parquet"):
+        # the warehouse is a sink: refresh CSV/Parquet here and load the result with warehouse.py
+        raise ValueError(f"incremental star schema supports csv or parquet output, not {output_format!r}")
+    files = sorted(glob.glob(input_glob.replace("\\", "/")))
+    registry = load_registry(output_folder)
+    if not registry["firms"]:
+        dim_firm_old = _read_existing(output_folder, "Dim_Firm", output_format)
+        if dim_firm_old is not None:
+            registry["firms"] = {str(k): int(v) for k, v in zip(dim_firm_old["FirmName"], dim_firm_old["FirmKey"])}
+
+    changed = _changed_files(files, registry)
+    current_firms = {os.path.splitext(os.path.basename(p))[0] for p in files}
+    removed = [name for name in registry["files"] if name not in current_firms]
+    if not changed and not removed:
+        save_registry(output_folder, registry)
+        logger.info("[starschema] no changed input files")
+        return 0
+
+    # 1-3) Only the changed files go through load, quarter derivation and aggregation
+    changed_names = [name for name, _, _, _ in changed]
+    if changed:
+        df_new = add_date_key(load_firm_files([path for _, path, _, _ in changed]))
+        agg_new = aggregate_holdings(df_new)
+    else:
+        df_new = None
+        agg_new = pd.DataFrame(columns=["FirmName", "CUSIP", "DateKey", "Shares", "Value"])
+
+    # Stable FirmKeys: append new firms after the highest key handed out so far
+    next_key = max(registry["firms"].values(), default=0) + 1
+    for name in sorted(changed_names):
+        if name not in registry["firms"]:
+            registry["firms"][name] = next_key
+            next_key += 1
+    dim_firm = (
+        pd.DataFrame(sorted(registry["firms"].items(), key=lambda kv: kv[1]), columns=["FirmName", "FirmKey"])
+    )
+    dim_firm = dim_firm[dim_firm["FirmName"].isin(current_firms)].reset_index(drop=True)
+
+    fact_new = (
+        agg_new.merge(dim_firm, on="FirmName", how="left")
+        .rename(columns={"CUSIP": "SecurityKey"})
+        .loc[:, ["FirmKey", "SecurityKey", "DateKey", "Shares", "Value"]]
+    )
+    replaced_keys = {registry["firms"][name] for name in changed_names + removed}
+
+    # Dim_Security: previous latest attributes + candidates from the changed files
+    os.makedirs(os.path.join(output_folder, STATE_DIR), exist_ok=True)
+    state_path = os.path.join(output_folder, STATE_DIR, SECURITY_STATE_FILE)
+    sec_state = pd.read_pickle(state_path) if os.path.exists(state_path) else None
+    if sec_state is None:
+        dim_security_old = _read_existing(output_folder, "Dim_Security", output_format)
+        if dim_security_old is not None:
+            sec_state = _security_state_from_dim(dim_security_old)
+    if df_new is not None:
+        candidates = latest_security_attrs(df_new)
+        sec_state = candidates if sec_state is None else latest_security_attrs(
+            pd.concat([sec_state, candidates], ignore_index=True)
+        )
+    if sec_state is None:
+        raise FileNotFoundError(
+            f"no security state ({state_path}) and no Dim_Security in {output_folder}: "
+            "build the star schema with transform_starschema or with changed input files first"
+        )
+    dim_security = build_dim_security(sec_state.drop(columns="report_dates").reset_index(drop=True))
+
+    # Dim_Date: calendar covering the known and the new quarters
+    dim_date_old = _read_existing(output_folder, "Dim_Date", output_format)
+    known_keys = dim_date_old["DateKey"].tolist() if dim_date_old is not None else []
+    dim_date = build_dim_date(known_keys + fact_new["DateKey"].tolist())
+
+    # Fact: drop the old rows of replaced firms, append the fresh ones
+    affected_date_keys = set(fact_new["DateKey"].unique())
+    for name in changed_names + removed:
+        affected_date_keys |= set(registry["files"].get(name, {}).get("date_keys", []))
+    tables = {"Dim_Security": dim_security, "Dim_Date": dim_date, "Dim_Firm": dim_firm}
+    change_name = "Fact_PositionChange"
+    removed_keys = {registry["firms"][name] for name in removed}
+    year_quarter = dim_date.set_index("DateKey")["YearQuarter"]
+
+    if output_format == "parquet":
+        quarters = {year_quarter[k] for k in affected_date_keys if k in year_quarter.index}
+        fact_folder = os.path.join(output_folder, "Fact_HoldingSnapshot")
+        old = read_fact(output_folder, year_quarters=quarters) if os.path.isdir(fact_folder) else None
+        if old is not None:
+            old = old.drop(columns="YearQuarter")
+            old["SecurityKey"] = old["SecurityKey"].astype(str)
+    else:
+        old = _read_existing(output_folder, "Fact_HoldingSnapshot", output_format)
+
+    # Position changes: only from the first quarter whose snapshot rows actually changed
+    old_changed = old[old["FirmKey"].isin(replaced_keys)] if old is not None else fact_new.iloc[:0]
+    since = _first_changed_date_keys(old_changed, fact_new)
+    if output_format == "parquet":
+        # Quarters whose change rows are dropped or recomputed (removed firms: all of their quarters)
+        change_keys = {k for k in affected_date_keys if removed or (len(since) and k >= since.min())}
+        change_quarters = {year_quarter[k] for k in change_keys if k in year_quarter.index}
+        has_changes = os.path.isdir(os.path.join(output_folder, change_name))
+        old_change = read_fact(output_folder, change_name, year_quarters=change_quarters) if has_changes else None
+        if old_change is not None:
+            old_change = old_change.drop(columns="YearQuarter")
+            old_change["SecurityKey"] = old_change["SecurityKey"].astype(str)
+    else:
+        old_change = _read_existing(output_folder, change_name, output_format)
+
+    if old is not None:
+        old = old[~old["FirmKey"].isin(replaced_keys)]
+    tables["Fact_HoldingSnapshot"] = pd.concat([old, fact_new], ignore_index=True)
+
+    if old_change is None:
+        # First run (or output from before Fact_PositionChange existed): build it from the complete fact
+        complete = tables["Fact_HoldingSnapshot"]
+        if output_format == "parquet" and os.path.isdir(os.path.join(output_folder, "Fact_HoldingSnapshot")):
+            complete = read_fact(output_folder, columns=["FirmKey", "SecurityKey", "DateKey", "Shares", "Value"])
+            complete["SecurityKey"] = complete["SecurityKey"].astype(str)
+            complete = pd.concat([complete[~complete["FirmKey"].isin(replaced_keys)], fact_new], ignore_index=True)
+        tables[change_name] = build_position_change(complete)
+    else:
+        recomputed = old_change["FirmKey"].isin(since.index) & (
+            old_change["DateKey"] >= old_change["FirmKey"].map(since)
+        )
+        kept = old_change[~recomputed & ~old_change["FirmKey"].isin(removed_keys)]
+        tables[change_name] = pd.concat(
+            [kept, build_position_change(fact_new, since)], ignore_index=True
+        ).loc[:, POSITION_CHANGE_COLUMNS]
+
+    if output_format == "parquet":
+        # read quarters left without rows (only removed firms held anything there) lose their partition
+        write_star_schema(tables, output_folder, replace_all=False,
+                          replace_quarters={"Fact_HoldingSnapshot": quarters, change_name: change_quarters})
+    else:
+        write_tables(tables, output_folder, output_format)
+
+    # Ownership index: only the affected quarters are rewritten (complete build if requested but missing)
+    if ownership_index is not False and os.path.isdir(os.path.join(output_folder, INDEX_DIR)):
+        build_ownership_index(tables["Fact_HoldingSnapshot"], output_folder, date_keys=affected_date_keys)
+    elif ownership_index:
+        complete = tables["Fact_HoldingSnapshot"]
+        if output_format == "parquet":
+            complete = read_fact(output_folder, columns=["FirmKey", "SecurityKey", "DateKey", "Shares", "Value"])
+        build_ownership_index(complete, output_folder)
+
+    # Remember what was processed
+    for name, path, stat, digest in changed:
+        registry["files"][name] = {
+            "path": path, "mtime": stat.st_mtime, "size": stat.st_size, "sha256": digest,
+            "date_keys": sorted(int(k) for k in agg_new.loc[agg_new["FirmName"] == name, "DateKey"].unique()),
+        }
+    for name in removed:
+        del registry["files"][name]  # key stays reserved in registry["firms"]
+    sec_state.to_pickle(state_path, compression="gzip")
+    save_registry(output_folder, registry)
+    logger.info("[starschema] reloaded %d firms, removed %d", len(changed), len(removed))
+    return len(changed)
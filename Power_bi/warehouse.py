@@ -0,0 +1,204 @@
+import os
+import glob
+import sqlite3
+import numbers
+import pandas as pd
+
+try:  # optional dependency, only needed for *.duckdb files (pip install duckdb)
+    import duckdb
+except ImportError:
+    duckdb = None
+
+# Local analytical store for the holdings and the star schema (one database file).
+#   *.duckdb -> DuckDB (columnar, bulk append straight from the DataFrame)
+#   anything else (e.g. holdings.sqlite) -> SQLite from the standard library
+# Example:
+#   con = connect(r"C:\Users\Niklas\Desktop\SEC_Power BI\holdings.duckdb")
+#   load_star_schema(con, transform_starschema(..., write_csv=False))
+#   top_holdings(con, firm="Berkshire Hathaway", date_key=20250630)
+#   cusip_ownership(con, "037833100", date_key=20250630)
+
+# Indexes created after every load (table -> list of column tuples)
+INDEXES = {
+    "holdings": [("FirmName", "report_dates"), ("CUSIP",)],
+    "Fact_HoldingSnapshot": [("FirmKey", "DateKey"), ("SecurityKey",)],
+    "Fact_PositionChange": [("FirmKey", "DateKey"), ("SecurityKey",)],
+    "Dim_Security": [("SecurityKey",)],
+    "Dim_Firm": [("FirmKey",)],
+}
+DATE_COLUMNS = ("report_dates", "Date")
+WAREHOUSE_FORMATS = ("sqlite", "duckdb")  # output_format values of transform_starschema
+
+
+def _is_duckdb(con):
+    return duckdb is not None and isinstance(con, duckdb.DuckDBPyConnection)
+
+
+def connect(path):
+    """Open (or create) the warehouse file; the backend is chosen by the file extension."""
+    if str(path).lower().endswith(".duckdb"):
+        if duckdb is None:
+            raise ImportError("DuckDB warehouse needs duckdb: pip install duckdb (or use a .sqlite file)")
+        return duckdb.connect(str(path))
+    return sqlite3.connect(str(path))
+
+
+def query(con, sql, params=()):
+    """Run a SELECT and return the result as DataFrame (both backends use ? placeholders)."""
+    if _is_duckdb(con):
+        return con.execute(sql, list(params)).df()
+    return pd.read_sql_query(sql, con, params=list(params))
+
+
+def table_exists(con, name):
+    if _is_duckdb(con):
+        sql = "SELECT COUNT(*) AS n FROM information_schema.tables WHERE table_name = ?"
+    else:
+        sql = "SELECT COUNT(*) AS n FROM sqlite_master WHERE type = 'table' AND name = ?"
+    return bool(query(con, sql, [name])["n"].iloc[0])
+
+
+def _sql_type(dtype):
+    if pd.api.types.is_bool_dtype(dtype):
+        return "BOOLEAN"
+    if pd.api.types.is_integer_dtype(dtype):
+        return "BIGINT"
+    if pd.api.types.is_float_dtype(dtype):
+        return "DOUBLE"
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return "DATE"
+    return "VARCHAR"
+
+
+def _prepare(df):
+    # Dates as datetime64 (DATE column), categoricals as their values
+    df = df.copy()
+    for col in df.columns:
+        if col in DATE_COLUMNS:
+            df[col] = pd.to_datetime(df[col])
+        elif isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(df[col].cat.categories.dtype)
+    return df
+
+
+def _create_table(con, name, df):
+    columns = ", ".join(f'"{col}" {_sql_type(dtype)}' for col, dtype in df.dtypes.items())
+    con.execute(f'CREATE TABLE IF NOT EXISTS "{name}" ({columns})')
+
+
+def _append(con, name, df):
+    """Bulk append: DuckDB scans the DataFrame directly, SQLite gets one executemany per load."""
+    if df.empty:
+        return
+    if _is_duckdb(con):
+        con.register("_append_df", df)
+        con.execute(f'INSERT INTO "{name}" SELECT * FROM _append_df')
+        con.unregister("_append_df")
+        return
+    rows = df.copy()
+    for col in rows.columns:
+        if pd.api.types.is_datetime64_any_dtype(rows[col]):
+            rows[col] = rows[col].dt.strftime("%Y-%m-%d")
+    # Python objects (int/float/str/None), sqlite3 cannot bind numpy scalars or pd.NA
+    rows = rows.astype(object).where(rows.notna(), None)
+    placeholders = ", ".join("?" * len(rows.columns))
+    con.executemany(f'INSERT INTO "{name}" VALUES ({placeholders})', rows.itertuples(index=False, name=None))
+
+
+def _create_indexes(con, name):
+    for cols in INDEXES.get(name, []):
+        index_name = f"idx_{name}_{'_'.join(cols)}"
+        col_list = ", ".join(f'"{c}"' for c in cols)
+        con.execute(f'CREATE INDEX IF NOT EXISTS "{index_name}" ON "{name}" ({col_list})')
+
+
+def load_table(con, name, df, replace=True):
+    """Create/replace (or append to) one table, bulk load the rows and (re)build its indexes."""
+    df = _prepare(df)
+    if replace:
+        con.execute(f'DROP TABLE IF EXISTS "{name}"')
+    _create_table(con, name, df)
+    _append(con, name, df)
+    _create_indexes(con, name)
+    if not _is_duckdb(con):  # DuckDB runs in auto-commit mode
+        con.commit()
+
+
+def load_star_schema(con, tables):
+    """Replace the star-schema tables (dict from transform_starschema) in the warehouse."""
+    for name, df in tables.items():
+        load_table(con, name, df, replace=True)
+
+
+def load_holdings(con, df, firm_name):
+    """Replace the parsed holdings of one firm (rows as written by csv__with_13fdata / update_13f_csv)."""
+    df = df.assign(FirmName=firm_name)
+    if table_exists(con, "holdings"):
+        con.execute('DELETE FROM "holdings" WHERE "FirmName" = ?', [firm_name])
+        columns = query(con, 'SELECT * FROM "holdings" LIMIT 0').columns
+        df = df.reindex(columns=columns)
+    load_table(con, "holdings", df, replace=False)
+
+
+def load_holdings_files(con, input_glob):
+    """Load every per-firm holdings file (CSV/Parquet, FirmName from the file name) into `holdings`."""
+    from columnar_io import read_holdings
+    files = sorted(glob.glob(input_glob.replace("\\", "/")))
+    for f in files:
+        load_holdings(con, read_holdings(f), os.path.splitext(os.path.basename(f))[0])
+    return len(files)
+
+
+def top_holdings(con, firm=None, date_key=None, n=10):
+    """
+    Largest positions by Value per firm and quarter (Fact_HoldingSnapshot + dimensions).
+    firm: FirmName or FirmKey (None = all firms); date_key: YYYYMMDD quarter end (None = all quarters).
+    """
+    filters, params = [], []
+    if firm is not None:
+        # numpy integers (a FirmKey taken from a DataFrame) are keys too; sqlite3 only binds Python ints
+        if isinstance(firm, numbers.Integral):
+            filters.append("f.FirmKey = ?")
+            params.append(int(firm))
+        else:
+            filters.append("f.FirmName = ?")
+            params.append(str(firm))
+    if date_key is not None:
+        filters.append("h.DateKey = ?")
+        params.append(int(date_key))
+    where = f"WHERE {' AND '.join(filters)}" if filters else ""
+    sql = f"""
+        SELECT * FROM (
+            SELECT f.FirmName, h.DateKey, h.SecurityKey, s.IssuerCompanyName, s.SecurityType,
+                   h.Shares, h.Value,
+                   ROW_NUMBER() OVER (PARTITION BY h.FirmKey, h.DateKey ORDER BY h.Value DESC) AS HoldingRank
+            FROM Fact_HoldingSnapshot h
+            JOIN Dim_Firm f ON f.FirmKey = h.FirmKey
+            LEFT JOIN Dim_Security s ON s.SecurityKey = h.SecurityKey
+            {where}
+        ) ranked
+        WHERE HoldingRank <= ?
+        ORDER BY FirmName, DateKey, HoldingRank
+    """
+    return query(con, sql, params + [int(n)])
+
+
+def cusip_ownership(con, cusip, date_key=None):
+    """
+    Every firm holding a CUSIP (per quarter), with its share of the reported shares/value
+    across all firms in that quarter.
+    """
+    filters, params = ["h.SecurityKey = ?"], [str(cusip)]
+    if date_key is not None:
+        filters.append("h.DateKey = ?")
+        params.append(int(date_key))
+    sql = f"""
+        SELECT f.FirmName, h.DateKey, h.Shares, h.Value,
+               CAST(h.Shares AS DOUBLE) / SUM(h.Shares) OVER (PARTITION BY h.DateKey) AS ShareOfShares,
+               CAST(h.Value AS DOUBLE) / SUM(h.Value) OVER (PARTITION BY h.DateKey) AS ShareOfValue
+        FROM Fact_HoldingSnapshot h
+        JOIN Dim_Firm f ON f.FirmKey = h.FirmKey
+        WHERE {' AND '.join(filters)}
+        ORDER BY h.DateKey DESC, h.Value DESC
+    """
+    return query(con, sql, params)
@@ -1,8 +1,13 @@
 from pickle import GLOBAL
+import os
+import sys
 import pandas as pd
 import edgar as ed
 import requests
-from bs4 import BeautifulSoup
+
+# The infoTable parser is shared with the extended pipeline in Power_bi/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "Power_bi"))
+from infotable_parser import parse_infotable_xml
 # pip install html5lib need to be run in the terminal (Together with the above installed packages of course)
 
 # Find from ticker the matching CIK number
@@ -50,27 +55,9 @@ def csv__with_13fdata():
         file = latest_13f.attachments[2] # the data is stored in xml files inside these attachments (just the name of the xml files)
         file_html_code = file.download() # we download each of these xml using the name from above
 
-        soup = BeautifulSoup(file_html_code, "xml")
-
-        rows = []
-
-        for info in soup.find_all("infoTable"):
-            row = {
-                "Company": info.find("nameOfIssuer").text if info.find("nameOfIssuer") else None,
-                "Class": info.find("titleOfClass").text if info.find("titleOfClass") else None,
-                "CUSIP": info.find("cusip").text if info.find("cusip") else None,
-                "Value": int(info.find("value").text) if info.find("value") else None,
-                "Shares": int(info.find("shrsOrPrnAmt").find("sshPrnamt").text) if info.find("shrsOrPrnAmt") else None,
-                "SharesType": info.find("shrsOrPrnAmt").find("sshPrnamtType").text if info.find(
-                    "shrsOrPrnAmt") else None,
-                "Discretion": info.find("investmentDiscretion").text if info.find("investmentDiscretion") else None,
-                
-            }
-            rows.append(row)
-
-        # Convert to DataFrame
-        data_frames = pd.DataFrame(rows)
-        print(data_frames.head()) # shows how the data look like in the data frame we created trough BeautifulSoup
+        # Parse the XML into a DataFrame (shared streaming parser from the Power_bi folder)
+        data_frames = parse_infotable_xml(file_html_code)
+        print(data_frames.head()) # shows how the data look like in the data frame we created from the XML
         print(data_frames.info())
 
 
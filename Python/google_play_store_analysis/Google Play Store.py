@@ -2,6 +2,8 @@ import matplotlib.pyplot as plt
 import pandas as pd
 import numpy as np
 import seaborn as sns
+from play_store_data import load_google_play
+from play_store_cube import load_cube, rollup, star_proportions
 
 # from Test import total_ratings
 
@@ -18,7 +20,9 @@ import seaborn as sns
 # -----------------------------------------------------------
 # Section: Load and clean data
 # -----------------------------------------------------------
-data_google_play = pd.read_csv("https://raw.githubusercontent.com/schlende/practical-pandas-projects/master/datasets/google-play-store-11-2018.csv")
+# Local Parquet cache (downloaded on the first run only), only the columns used below,
+# genre as category, counts as integers and released already parsed as date (see play_store_data.py)
+data_google_play = load_google_play()
 print("General Information about the Data Frame")
 print(data_google_play.head())
 print(data_google_play.info())
@@ -33,42 +37,42 @@ print(data_google_play[data_google_play["app_id"].duplicated()]) # Duplicated()
 print(data_google_play.isna().sum().to_frame('missing_values')) # 846 values missing in released (Compared to 62694 Rows small amount)
 data_google_play = data_google_play.dropna()
 print("\nSample of 'released' column:\n")
-data_google_play["released"] = pd.to_datetime(data_google_play["released"])  # Needs to be converted to a date object
+print(data_google_play["released"].head())  # Already a date object (parsed once with a fixed format in the cache)
+
+# -----------------------------------------------------------
+# Section: Aggregate cube
+# -----------------------------------------------------------
+# All tables and plots below are served from one genre x install_group cube (counts, install sums, score sums,
+# star counts), built in a single grouped pass over the cleaned data and cached next to the data cache
+install_bins = [0, 100000, 1000000, float('inf')]
+install_labels = ['0-100k', '100k–1M', '>1M']
+cube = load_cube(bins=install_bins, labels=install_labels)
+by_install_group = rollup(cube, "install_group")
+by_genre = rollup(cube, "genre")
 
 # -----------------------------------------------------------
 # 📊 SECTION: Install Buckets vs. Rating Quality
 # -----------------------------------------------------------
 # Understand whether apps with higher install counts are truly better rated, or simply more visible.
 print("\nApp Popularity Analysis\n")
-# Split them into groups of min_installs
+# Split them into groups of min_installs (install_bins / install_labels of the cube)
 # Investigate the amount of apps in each class
-data_google_play['install_group'] = pd.cut(data_google_play['min_installs'],
-    bins=[0, 100000, 1000000, float('inf')],
-    labels=['0-100k', '100k–1M', '>1M'])
-a = data_google_play['install_group'].value_counts(normalize = True)
+a = (by_install_group["apps"] / by_install_group["apps"].sum()).sort_values(ascending = False)
 print(f"Amount of Apps in each {a}:")
 # Around 8% of app over 1 million, 19% = 100k–1M and 73% = 0-100k
 
 # Next: Look if the satisfaction(star) distribution is different among these groups
 print("\nProportion of different Star Ratings in each install_group")
-number_ratings_score = data_google_play.groupby("install_group")[
-    ['rating_one_star', 'rating_two_star','rating_three_star','rating_four_star', 'rating_five_star']].sum()
-total_ratings = number_ratings_score.sum(axis = 1)
-number_ratings_score_prop = number_ratings_score.div(total_ratings, axis = 0)
-number_ratings_score_prop.columns = [
-    'prop_one_star', 'prop_two_star', 'prop_three_star', 'prop_four_star', 'prop_five_star'
-]
+number_ratings_score = by_install_group[
+    ['rating_one_star', 'rating_two_star','rating_three_star','rating_four_star', 'rating_five_star']]
+number_ratings_score_prop = star_proportions(cube, "install_group")
 print(number_ratings_score_prop)
 # The App rating distribution is nearly exactly the same across different Popularity level(measured by install brackets)
 # Therefore the mean score should also be the same
-Star = [1,2,3,4,5]
-Average_First = (number_ratings_score_prop.loc["0-100k", :]*Star).sum()
-Average_Second = (number_ratings_score_prop.loc["100k–1M", :]*Star).sum()
-Average_Third = (number_ratings_score_prop.loc[">1M", :]*Star).sum()
+# Rating-weighted average star value per install group (works for any bucket edges)
 print("\nAverage Ratings across install groups\n")
-print(f"Average Rating 0-100k : {Average_First:.2f}")
-print(f"Average Rating 100k–1M: {Average_Second:.2f}")
-print(f"Average Rating >1M: {Average_Third:.2f}")
+for group, average in by_install_group["avg_rating"].items():
+    print(f"Average Rating {group}: {average:.2f}")
 # Conclusion: Popular apps (measured by install brackets) are not rated more positively than less popular ones
 
 
@@ -114,11 +118,11 @@ plt.show()
 # "Certain genres are inherently more successful than others."
 print("\nApp Popularity Analysis by Genre\n")
 
-install_levels_genre = data_google_play.groupby("genre")["min_installs"].sum().sort_values(ascending = False)
+install_levels_genre = by_genre["installs"].sort_values(ascending = False)
 print(install_levels_genre) # So the 3 most downloaded genres are (Tools, Communication, Productivity)
 top_10installs = install_levels_genre.head(10)
-top_10apps = data_google_play.value_counts("genre").sort_values(ascending = False).head(10)
-top_10scores = data_google_play.groupby("genre")["score"].mean().sort_values(ascending = False).head(10)
+top_10apps = by_genre["apps"].sort_values(ascending = False).head(10)
+top_10scores = by_genre["score_mean"].sort_values(ascending = False).head(10)
 
 
 # All Categories
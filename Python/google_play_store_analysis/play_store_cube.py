@@ -0,0 +1,89 @@
+import os
+import hashlib
+import numpy as np
+import pandas as pd
+from play_store_data import DEFAULT_CACHE_PATH, ANALYSIS_COLUMNS, RATING_COLUMNS, load_google_play
+
+# genre x install_group aggregate cube of the Google Play dataset, built in one grouped pass and cached.
+# The cube keeps additive measures only (counts and sums), so every view - per genre, per install group
+# or both - is a cheap roll-up of a few hundred cube rows instead of another pass over the apps:
+#   apps, installs, score_sum, score_count, rating_one_star ... rating_five_star
+# Example:
+#   cube = load_cube()                                   # cached after the first call
+#   rollup(cube, "install_group")[["apps", "avg_rating"]]
+#   rollup(cube, "genre")["installs"].nlargest(10)
+
+INSTALL_BINS = [0, 100000, 1000000, float("inf")]
+INSTALL_LABELS = ["0-100k", "100k–1M", ">1M"]
+STARS = [1, 2, 3, 4, 5]  # star value of each RATING_COLUMNS entry
+MEASURES = ["apps", "installs", "score_sum", "score_count"] + RATING_COLUMNS
+
+
+def build_cube(df, bins=INSTALL_BINS, labels=INSTALL_LABELS):
+    """
+    One grouped pass over the apps: measures per (genre, install_group).
+    Apps outside the bucket edges keep install_group NA, so they still count in the genre totals.
+    """
+    install_group = pd.cut(df["min_installs"], bins=bins, labels=labels)
+    cube = (
+        df.assign(install_group=install_group)
+        .groupby(["genre", "install_group"], observed=True, dropna=False)
+        .agg(
+            apps=("min_installs", "size"),
+            installs=("min_installs", "sum"),
+            score_sum=("score", "sum"),
+            score_count=("score", "count"),
+            **{col: (col, "sum") for col in RATING_COLUMNS},
+        )
+        .reset_index()
+    )
+    return cube
+
+
+def _cube_path(cache_dir, bins, labels):
+    # one cache file per bucket definition
+    key = hashlib.sha1(repr((list(bins), list(labels))).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(cache_dir, f"cube_{key}.parquet")
+
+
+def load_cube(bins=INSTALL_BINS, labels=INSTALL_LABELS, data_path=DEFAULT_CACHE_PATH, refresh=False):
+    """
+    Cube of the cleaned dataset (analysis columns, rows with missing values dropped), cached next to
+    the data cache. Rebuilt when the data cache is newer, for new bucket edges or with refresh=True.
+    """
+    path = _cube_path(os.path.dirname(os.path.abspath(data_path)), bins, labels)
+    fresh = (os.path.exists(path) and os.path.exists(data_path)
+             and os.path.getmtime(path) >= os.path.getmtime(data_path))
+    if refresh or not fresh:
+        cube = build_cube(load_google_play(ANALYSIS_COLUMNS, cache_path=data_path).dropna(), bins, labels)
+        tmp = path + ".tmp"
+        cube.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+    else:
+        cube = pd.read_parquet(path)
+    # bucket order (plots, hue order) as defined by labels
+    cube["install_group"] = pd.Categorical(cube["install_group"], categories=labels, ordered=True)
+    return cube
+
+
+def rollup(cube, by):
+    """
+    Measures rolled up to `by` ("genre", "install_group" or both) plus derived metrics:
+    score_mean (mean app score), ratings (all star ratings) and avg_rating (rating-weighted stars).
+    Grouping by install_group leaves out apps outside the bucket edges.
+    """
+    totals = cube.groupby(by, observed=True)[MEASURES].sum()
+    totals["score_mean"] = totals["score_sum"] / totals["score_count"]
+    totals["ratings"] = totals[RATING_COLUMNS].sum(axis=1)
+    # ratios as plain float64 (the counts are nullable Int64, see load_google_play)
+    totals["avg_rating"] = (totals[RATING_COLUMNS].to_numpy(dtype=float) @ np.array(STARS)
+                            / totals["ratings"].to_numpy(dtype=float))
+    return totals
+
+
+def star_proportions(cube, by="install_group"):
+    """Share of each star rating (prop_one_star ... prop_five_star) per group."""
+    totals = rollup(cube, by)
+    props = totals[RATING_COLUMNS].div(totals["ratings"], axis=0).astype(float)
+    props.columns = [col.replace("rating_", "prop_") for col in RATING_COLUMNS]
+    return props
@@ -0,0 +1,99 @@
+import os
+import pandas as pd
+
+try:  # optional dependency, only needed for the Parquet cache (pip install pyarrow)
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# Google Play Store dataset (11/2018), downloaded once into a local Parquet cache with explicit types.
+# Later runs read the cache memory-mapped and only the requested columns (no network needed).
+# Example:
+#   from play_store_data import load_google_play
+#   data_google_play = load_google_play()                      # analysis columns
+#   data_google_play = load_google_play(columns=None)          # every column
+#   data_google_play = load_google_play(refresh=True)          # download again
+
+DATA_URL = "https://raw.githubusercontent.com/schlende/practical-pandas-projects/master/datasets/google-play-store-11-2018.csv"
+DEFAULT_CACHE_PATH = os.environ.get(
+    "GOOGLE_PLAY_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "google_play", "google-play-store-11-2018.parquet"),
+)
+
+RATING_COLUMNS = ["rating_one_star", "rating_two_star", "rating_three_star", "rating_four_star", "rating_five_star"]
+# Columns used by "Google Play Store.py"
+ANALYSIS_COLUMNS = ["app_id", "genre", "min_installs", "score", "released"] + RATING_COLUMNS
+# Formats of the 'released' column, the first one that parses every value is used (no per-value inference)
+RELEASED_FORMATS = ("%b %d, %Y", "%B %d, %Y", "%Y-%m-%d")
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("The Google Play cache needs pyarrow: pip install pyarrow")
+
+
+def _types():
+    # Explicit column types, columns not listed here keep the type pyarrow infers
+    return {
+        "app_id": pa.string(),
+        "genre": pa.dictionary(pa.int32(), pa.string()),
+        "min_installs": pa.int64(),
+        "score": pa.float64(),
+        "released": pa.date32(),
+        **{col: pa.int64() for col in RATING_COLUMNS},
+    }
+
+
+def parse_released(values):
+    """'released' strings -> datetime64 with one fixed format (see RELEASED_FORMATS); missing stays NaT."""
+    for fmt in RELEASED_FORMATS:
+        try:
+            return pd.to_datetime(values, format=fmt)
+        except (ValueError, TypeError):
+            continue
+    sample = values.dropna().head(3).tolist()
+    raise ValueError(f"'released' matches none of {RELEASED_FORMATS}, e.g. {sample}")
+
+
+def to_arrow(df):
+    """Raw CSV DataFrame -> Arrow table with the explicit types above (integer counts, categorical genre, date)."""
+    _require_pyarrow()
+    types = _types()
+    df = df.copy()
+    for col in df.columns:
+        if col == "released":
+            df[col] = parse_released(df[col]).dt.date
+        elif col in types and pa.types.is_integer(types[col]):
+            df[col] = df[col].astype("Int64")  # counts with missing values stay integers
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    schema = pa.schema([
+        pa.field(name, types.get(name, table.schema.field(name).type)) for name in table.column_names
+    ])
+    return table.cast(schema)
+
+
+def download_google_play(cache_path=DEFAULT_CACHE_PATH, url=DATA_URL):
+    """Download the CSV once and write it (all columns) to the Parquet cache; returns the cache path."""
+    _require_pyarrow()
+    print(f"Downloading {url}")
+    raw = pd.read_csv(url)
+    os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+    tmp = cache_path + ".tmp"
+    pq.write_table(to_arrow(raw), tmp, compression="zstd")
+    os.replace(tmp, cache_path)
+    return cache_path
+
+
+def load_google_play(columns=ANALYSIS_COLUMNS, cache_path=DEFAULT_CACHE_PATH, url=DATA_URL, refresh=False):
+    """
+    Google Play dataset from the local cache (downloaded on the first call or with refresh=True).
+    - columns: only these columns are read (None = all)
+    - genre comes back as category, min_installs/rating counts as Int64, released as datetime64
+    """
+    _require_pyarrow()
+    if refresh or not os.path.exists(cache_path):
+        download_google_play(cache_path, url)
+    table = pq.read_table(cache_path, columns=None if columns is None else list(columns), memory_map=True)
+    # integer columns as nullable Int64 (pyarrow would turn counts with nulls into float64)
+    return table.to_pandas(date_as_object=False, types_mapper={pa.int64(): pd.Int64Dtype()}.get)
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+from imputation import GroupMedianImputer
+
+# Check of GroupMedianImputer.fit_transform against the original training-side imputation of
+# cleaning_and_model.ipynb (grouped ffill/bfill, then per-column lambdas level by level, then the global median).
+# The panels include an (income_group, region) group whose column is missing entirely, so the income_group
+# median has to be taken after the income_group x region fill.
+# Example:
+#   python check_imputation.py
+
+GROUP_COLUMNS = ["cpi_inflation_pct", "gdp_deflator_inflation_pct"]
+
+
+def reference_imputation(train_df, group_columns=GROUP_COLUMNS):
+    """The notebook's training-side code, unchanged apart from the function wrapper."""
+    train_df = train_df.sort_values(['economy', 'years'])
+    cols_missing_values = train_df.columns[train_df.isna().sum() > 0]
+    for col in cols_missing_values:
+        train_df[col] = train_df.groupby("economy")[col].ffill()
+        train_df[col] = train_df.groupby("economy")[col].bfill()
+    for col in group_columns:
+        train_df[col] = train_df.groupby(['income_group', 'region'])[col].transform(lambda x: x.fillna(x.median()))
+        train_df[col] = train_df.groupby('income_group')[col].transform(lambda x: x.fillna(x.median()))
+        train_df[col] = train_df[col].fillna(train_df[col].median())
+    cols_missing_values = train_df.columns[train_df.isna().sum() > 0]
+    for col in cols_missing_values:
+        train_df[col] = train_df[col].fillna(train_df[col].median())
+    return train_df
+
+
+def small_panel():
+    """
+    7 economies, 2 years: group (H, R2) has no value at all; F (H, R1) has none either and gets the (H, R1)
+    median, which then moves the H median used for C.
+    """
+    rows = [
+        ("A", "H", "R1", [1.0, 2.0]), ("B", "H", "R1", [np.nan, 3.0]), ("F", "H", "R1", [np.nan, np.nan]),
+        ("G", "H", "R3", [100.0, 101.0]), ("C", "H", "R2", [np.nan, np.nan]),
+        ("D", "L", "R1", [20.0, np.nan]), ("E", "L", "R2", [np.nan, 9.0]),
+    ]
+    return pd.DataFrame([
+        {"economy": econ, "income_group": inc, "region": reg, "years": 2000 + t,
+         "cpi_inflation_pct": values[t], "gdp_deflator_inflation_pct": values[t], "other_pct": np.nan if t else 1.0}
+        for econ, inc, reg, values in rows for t in range(2)
+    ])
+
+
+def random_panel(n_economies=150, n_years=30, missing=0.3, seed=0):
+    rng = np.random.default_rng(seed)
+    economies = [f"E{i:03d}" for i in range(n_economies)]
+    income = dict(zip(economies, rng.choice(["Low", "Lower middle", "Upper middle", "High"], n_economies)))
+    region = dict(zip(economies, rng.choice([f"R{i}" for i in range(7)], n_economies)))
+    df = pd.DataFrame([(e, y) for e in economies for y in range(1990, 1990 + n_years)], columns=["economy", "years"])
+    df["income_group"], df["region"] = df["economy"].map(income), df["economy"].map(region)
+    for col in GROUP_COLUMNS + ["other_pct"]:
+        df[col] = np.where(rng.random(len(df)) < missing, np.nan, rng.normal(5, 3, len(df)))
+    # every economy of one (income_group, region) group without any cpi value,
+    # plus single economies without any value in otherwise populated groups
+    empty = (df["income_group"] == income["E000"]) & (df["region"] == region["E000"])
+    df.loc[empty, "cpi_inflation_pct"] = np.nan
+    for col in GROUP_COLUMNS:
+        df.loc[df["economy"].isin(rng.choice(economies, n_economies // 10, replace=False)), col] = np.nan
+    return df
+
+
+def check_imputation():
+    for name, panel in (("small panel", small_panel()), ("random panel", random_panel())):
+        expected = reference_imputation(panel.copy())
+        got = GroupMedianImputer(group_columns=GROUP_COLUMNS).fit_transform(panel.copy())
+        pd.testing.assert_frame_equal(got.loc[expected.index], expected)
+        print(f"{name}: {len(panel)} rows identical to the notebook's sequential imputation")
+
+
+if __name__ == "__main__":
+    check_imputation()
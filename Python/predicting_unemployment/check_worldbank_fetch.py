@@ -0,0 +1,81 @@
+import os
+import sys
+import json
+import random
+import tempfile
+import pandas as pd
+from worldbank_fetch import fetch_panel, serve_recorded_api
+
+# End-to-end check of fetch_panel against recorded data (no access to api.worldbank.org needed):
+# a small recorded slice cache (economies incl. an aggregate, several series and years) is served by
+# serve_recorded_api with a share of 503 answers, fetched into an empty cache and compared with the
+# panel built directly from the recorded values. A run with refresh=True must replace a tampered cache
+# entry, and a last run with the server stopped must be answered from the slice cache alone.
+# Example:
+#   python check_worldbank_fetch.py          # optional argument: error rate of the stand-in (default 0.2)
+
+SERIES = ["SL.UEM.TOTL.ZS", "NY.GDP.MKTP.KD.ZG", "FP.CPI.TOTL.ZG"]
+ECONOMIES = {"CHL": "Latin America & Caribbean", "DEU": "Europe & Central Asia", "MNG": "East Asia & Pacific",
+             "WLD": "Aggregates", "EUU": "Aggregates"}
+START, END = 1990, 2009
+
+
+def write_recording(folder, seed=0):
+    """Recorded slice cache (same layout as fetch_panel's cache_dir); returns the long records."""
+    rng = random.Random(seed)
+    records = []
+    for series in SERIES:
+        rows = [[econ, year, None if rng.random() < 0.1 else round(rng.uniform(-5, 15), 3)]
+                for econ in ECONOMIES for year in range(START, END + 1)]
+        os.makedirs(os.path.join(folder, series))
+        with open(os.path.join(folder, series, f"all_{START}_{END}.json"), "w", encoding="utf-8") as f:
+            json.dump(rows, f)
+        records += [(series, econ, year, value) for econ, year, value in rows]
+    with open(os.path.join(folder, "economies.json"), "w", encoding="utf-8") as f:
+        json.dump(ECONOMIES, f)
+    return pd.DataFrame(records, columns=["series", "economy", "year", "value"])
+
+
+def expected_panel(records):
+    """Wide panel straight from the recorded values (aggregates and missing values dropped)."""
+    keep = records["value"].notna() & records["economy"].map(ECONOMIES).ne("Aggregates")
+    panel = records[keep].pivot(index=["year", "economy"], columns="series", values="value").reset_index()
+    panel.columns.name = None
+    panel.insert(0, "years", pd.to_datetime(panel.pop("year").astype(str), format="%Y"))
+    return panel
+
+
+def _normalized(panel):
+    return panel[["years", "economy"] + SERIES].sort_values(["years", "economy"]).reset_index(drop=True)
+
+
+def check_fetch_panel(error_rate=0.2):
+    recording, cache_dir = tempfile.mkdtemp(), tempfile.mkdtemp()
+    expected = _normalized(expected_panel(write_recording(recording)))
+    server = serve_recorded_api(recording, error_rate=error_rate)
+    base_url = f"http://127.0.0.1:{server.server_port}/v2"
+    try:
+        fetched = fetch_panel(SERIES, start=START, end=END, years_per_slice=5, max_workers=4,
+                              base_url=base_url, cache_dir=cache_dir, retries=10, column_names={})
+        # a stale cache entry is used as it is, unless the run refreshes
+        stale = os.path.join(cache_dir, SERIES[0], f"all_{START}_{START + 4}.json")
+        with open(stale, "w", encoding="utf-8") as f:
+            json.dump([], f)
+        refreshed = fetch_panel(SERIES, start=START, end=END, years_per_slice=5, max_workers=4, base_url=base_url,
+                                cache_dir=cache_dir, retries=10, column_names={}, refresh=True)
+    finally:
+        server.shutdown()
+        server.server_close()
+    pd.testing.assert_frame_equal(_normalized(fetched), expected, check_dtype=False)
+    pd.testing.assert_frame_equal(_normalized(refreshed), expected, check_dtype=False)
+    # server stopped: every slice and the economy list must come from the cache now
+    cached = fetch_panel(SERIES, start=START, end=END, years_per_slice=5, base_url=base_url,
+                         cache_dir=cache_dir, retries=0, column_names={})
+    pd.testing.assert_frame_equal(_normalized(cached), expected, check_dtype=False)
+    print(f"fetch_panel: {len(expected)} country-years x {len(SERIES)} series identical "
+          f"(error rate {error_rate:.0%}), refresh replaced a stale slice, "
+          f"re-run served from the cache")
+
+
+if __name__ == "__main__":
+    check_fetch_panel(float(sys.argv[1]) if len(sys.argv) > 1 else 0.2)
@@ -0,0 +1,115 @@
+import os
+import time
+import itertools
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.decomposition import PCA
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.preprocessing import StandardScaler
+
+# Walk-forward evaluation of several models on the same time-series folds (cleaning_and_model.ipynb).
+# - StandardScaler + PCA are fitted once per fold (prepare_folds), every model reuses the projected matrices
+# - (model, fold) jobs run on a process pool; the folds are sent to each worker once
+# - the result is a tidy table: one row per model and fold with RMSE, R2, MAE and timings
+# Example:
+#   folds = prepare_folds(X, y, TimeSeriesSplit(n_splits=5), n_components=0.90)
+#   fold_results = evaluate_models(models, folds)
+#   summarize(fold_results)
+
+Fold = namedtuple("Fold", ["X_train", "X_test", "y_train", "y_test", "prep_seconds"])
+RESULT_COLUMNS = ["model", "fold", "n_train", "n_test", "n_components", "RMSE", "R2", "MAE",
+                  "fit_seconds", "predict_seconds"]
+
+_worker_folds = None  # folds of the current worker process (set by _init_worker)
+
+
+def prepare_folds(X, y, splitter, n_components=0.90):
+    """Scaled + PCA-projected train/test matrices of every split (fitted on the training part only)."""
+    folds = []
+    for train_idx, test_idx in splitter.split(X):
+        start = time.perf_counter()
+        scaler = StandardScaler()
+        pca = PCA(n_components=n_components)
+        X_train = pca.fit_transform(scaler.fit_transform(X[train_idx]))
+        X_test = pca.transform(scaler.transform(X[test_idx]))
+        folds.append(Fold(X_train, X_test, y[train_idx], y[test_idx], time.perf_counter() - start))
+    return folds
+
+
+def param_grid(name, model, grid):
+    """Model variants for a hyperparameter grid: {'<name> (k=v, ...)': estimator} for evaluate_models."""
+    keys = list(grid)
+    variants = {}
+    for values in itertools.product(*(grid[k] for k in keys)):
+        params = dict(zip(keys, values))
+        label = ", ".join(f"{k}={v}" for k, v in params.items())
+        variants[f"{name} ({label})"] = clone(model).set_params(**params)
+    return variants
+
+
+def _init_worker(folds):
+    global _worker_folds
+    _worker_folds = folds
+
+
+def _run_job(name, model, fold_no, folds=None, single_thread=False):
+    # Fit one model on one fold and score it
+    fold = (folds if folds is not None else _worker_folds)[fold_no]
+    model = clone(model)
+    if single_thread and "n_jobs" in model.get_params():
+        model.set_params(n_jobs=1)  # the pool already uses every core
+    start = time.perf_counter()
+    model.fit(fold.X_train, fold.y_train)
+    fitted = time.perf_counter()
+    y_pred = model.predict(fold.X_test)
+    predicted = time.perf_counter()
+    return {
+        "model": name,
+        "fold": fold_no,
+        "n_train": len(fold.y_train),
+        "n_test": len(fold.y_test),
+        "n_components": fold.X_train.shape[1],
+        "RMSE": float(np.sqrt(mean_squared_error(fold.y_test, y_pred))),
+        "R2": float(r2_score(fold.y_test, y_pred)),
+        "MAE": float(mean_absolute_error(fold.y_test, y_pred)),
+        "fit_seconds": fitted - start,
+        "predict_seconds": predicted - fitted,
+    }
+
+
+def evaluate_models(models, folds, max_workers=None):
+    """
+    Fit every model on every fold; returns one row per (model, fold) in RESULT_COLUMNS.
+    - models: {name: estimator} (estimators are cloned, the originals stay unfitted)
+    - max_workers: processes of the pool (None = all cores, 1 = run in this process)
+      in the pool, models with n_jobs run single-threaded to avoid oversubscription
+    """
+    jobs = [(name, model, fold_no) for name, model in models.items() for fold_no in range(len(folds))]
+    if not jobs:  # no models or no folds
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1 or len(jobs) == 1:
+        rows = [_run_job(name, model, fold_no, folds) for name, model, fold_no in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(jobs)), initializer=_init_worker,
+                                 initargs=(folds,)) as pool:
+            futures = [pool.submit(_run_job, name, model, fold_no, None, True) for name, model, fold_no in jobs]
+            rows = [f.result() for f in futures]
+    return pd.DataFrame(rows, columns=RESULT_COLUMNS)
+
+
+def summarize(fold_results):
+    """Per model: mean RMSE/R2/MAE across the folds (as in the notebook) and the total fit/predict time."""
+    summary = fold_results.groupby("model", sort=False).agg(
+        RMSE=("RMSE", "mean"),
+        R2=("R2", "mean"),
+        MAE=("MAE", "mean"),
+        folds=("fold", "count"),
+        fit_seconds=("fit_seconds", "sum"),
+        predict_seconds=("predict_seconds", "sum"),
+    )
+    return summary
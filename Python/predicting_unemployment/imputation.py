@@ -0,0 +1,72 @@
+import pandas as pd
+
+# Imputation of the country-year panel (cleaning_and_model.ipynb), fitted on the training years only:
+#   (1) within-economy forward/backward fill (keeps the local trend)
+#   (2) median by income_group x region   \
+#   (3) median by income_group              } only for the subgroup columns
+#   (4) global median (every numeric column)
+# Each level's medians are taken after the finer levels were filled (same as the sequential per-column fill).
+# All columns are filled together with grouped ffill/bfill, one merge per hierarchy level and fillna,
+# so the cost grows with the number of rows, not rows x columns (works for quarterly/monthly panels too).
+# Example:
+#   imputer = GroupMedianImputer(group_columns=['cpi_inflation_pct', 'gdp_deflator_inflation_pct'])
+#   train_df = imputer.fit_transform(train_df)
+#   test_df = imputer.transform(test_df)      # stored training medians, no leakage
+
+HIERARCHY = [["income_group", "region"], ["income_group"]]
+
+
+class GroupMedianImputer:
+    """
+    Fit/transform imputer for a panel (one row per entity and period).
+    - group_columns: columns imputed with the subgroup medians of HIERARCHY before the global median
+    - entity/time: panel keys of the within-entity forward/backward fill
+    """
+
+    def __init__(self, group_columns=(), entity="economy", time="years", hierarchy=HIERARCHY):
+        self.group_columns = list(group_columns)
+        self.entity = entity
+        self.time = time
+        self.hierarchy = [list(level) for level in hierarchy]
+
+    def _fill_within_entity(self, df, columns):
+        # Sorted copy by entity and period, then one grouped ffill/bfill over all columns
+        df = df.sort_values([self.entity, self.time], kind="stable")
+        df[columns] = df.groupby(self.entity, sort=False)[columns].ffill()
+        df[columns] = df.groupby(self.entity, sort=False)[columns].bfill()
+        return df
+
+    def _fill_level(self, df, level, medians):
+        # one join maps every row to the median of its group (unknown groups stay NA)
+        lookup = df[level].join(medians, on=level)
+        df[self.group_columns] = df[self.group_columns].fillna(lookup[self.group_columns])
+
+    def fit(self, df):
+        """
+        Store the medians of every hierarchy level and the global medians. Levels are fitted in order:
+        each level's medians are taken after the previous levels' fills (as the sequential per-column fill
+        did), so a group that is entirely missing gets the median of the already filled coarser group.
+        """
+        keys = {self.entity, self.time}.union(*map(set, self.hierarchy))
+        self.columns_ = [c for c in df.select_dtypes("number").columns if c not in keys]
+        filled = self._fill_within_entity(df, self.columns_)
+        self.group_medians_ = []
+        if self.group_columns:
+            for level in self.hierarchy:
+                medians = filled.groupby(level, observed=True)[self.group_columns].median()
+                self._fill_level(filled, level, medians)
+                self.group_medians_.append(medians)
+        self.global_median_ = filled[self.columns_].median()
+        return self
+
+    def transform(self, df):
+        """Impute a frame (train or test) with the fitted medians; rows keep the input order."""
+        columns = [c for c in self.columns_ if c in df.columns]
+        out = self._fill_within_entity(df, columns)
+        for level, medians in zip(self.hierarchy, self.group_medians_):
+            self._fill_level(out, level, medians)
+        out[columns] = out[columns].fillna(self.global_median_[columns])
+        return out.loc[df.index]
+
+    def fit_transform(self, df):
+        return self.fit(df).transform(df)
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+
+# Lag / rolling-window features of a panel (one row per entity and period) from a specification:
+#   lags    = [(columns, [lags]), ...]                  -> '<column>_lag<k>'
+#   rolling = [(columns, [windows], [stats]), ...]     -> '<column>_roll<w>_<stat>'
+# The panel is sorted once, the value columns go into one contiguous float array and every lag is a
+# single shift of that array with the entity boundaries masked (no per-column groupby passes).
+# Rolling windows cover the `w` periods before the current one (only past information).
+# Example:
+#   builder = LagFeatureBuilder(lags=[(numeric_cols, [1]), (['cpi_inflation_pct'], [2, 4])])
+#   X_train, y_train = builder.matrices(train_df, target='unemployment_rate_pct')
+#   X_test, y_test = builder.matrices(test_df, target='unemployment_rate_pct', history=train_df)
+
+ROLLING_STATS = {
+    "mean": np.mean,
+    "std": lambda w, axis: np.std(w, axis=axis, ddof=1),  # sample std as pandas rolling().std()
+    "min": np.min,
+    "max": np.max,
+}
+
+
+class LagFeatureBuilder:
+    """
+    Builds named lag and rolling-window features; the same spec is applied to train and test frames.
+    - lags: [(columns, lags)], names are added lag by lag within an entry
+    - rolling: [(columns, windows, stats)] with stats from ROLLING_STATS
+    - entity/time: panel keys (shifts never cross entities, rows are consecutive periods)
+    """
+
+    def __init__(self, lags=(), rolling=(), entity="economy", time="years"):
+        self.lags = [(list(columns), list(lags)) for columns, lags in lags]
+        self.rolling = [(list(columns), list(windows), list(stats)) for columns, windows, stats in rolling]
+        for _, _, stats in self.rolling:
+            unknown = set(stats) - set(ROLLING_STATS)
+            if unknown:
+                raise ValueError(f"Unknown rolling stats {sorted(unknown)}, use {list(ROLLING_STATS)}")
+        self.entity = entity
+        self.time = time
+
+    @property
+    def source_columns(self):
+        """Columns the features are built from (in first-use order)."""
+        columns = [c for cols, _ in self.lags for c in cols] + [c for cols, _, _ in self.rolling for c in cols]
+        return list(dict.fromkeys(columns))
+
+    @property
+    def feature_names(self):
+        names = [f"{c}_lag{k}" for cols, lags in self.lags for k in lags for c in cols]
+        names += [f"{c}_roll{w}_{s}" for cols, windows, stats in self.rolling
+                  for w in windows for s in stats for c in cols]
+        return names
+
+    def transform(self, df, history=None):
+        """
+        Feature frame (entity, time + feature_names) for the rows of df, sorted by entity and time.
+        history: earlier rows (e.g. the training years) used as lag source only, so the first test
+        periods get their lags from the training data instead of NA.
+        """
+        frame = df[[self.entity, self.time] + self.source_columns].assign(_target=True)
+        if history is not None:
+            past = history[[self.entity, self.time] + self.source_columns].assign(_target=False)
+            frame = pd.concat([past, frame])
+        frame = frame.sort_values([self.entity, self.time], kind="stable")
+
+        values = np.ascontiguousarray(frame[self.source_columns].to_numpy(dtype=float))
+        codes = pd.factorize(frame[self.entity])[0]
+        position = {c: i for i, c in enumerate(self.source_columns)}
+        n = len(values)
+        blocks = []
+        for cols, lags in self.lags:
+            idx = [position[c] for c in cols]
+            for k in lags:
+                shifted = np.full((n, len(idx)), np.nan)
+                if k < n:
+                    shifted[k:] = values[:n - k, idx]
+                    shifted[k:][codes[k:] != codes[:n - k]] = np.nan  # lag comes from another entity
+                blocks.append(shifted)
+        for cols, windows, stats in self.rolling:
+            idx = [position[c] for c in cols]
+            for w in windows:
+                rolled = {s: np.full((n, len(idx)), np.nan) for s in stats}
+                if w < n:
+                    # windows[j] covers rows j .. j+w-1 and feeds row j+w (the period after the window)
+                    windows_view = np.lib.stride_tricks.sliding_window_view(values[:n - 1, idx], w, axis=0)[:n - w]
+                    valid = codes[w:] == codes[:n - w]  # whole window inside the same entity
+                    for s in stats:
+                        rolled[s][w:] = ROLLING_STATS[s](windows_view, axis=-1)
+                        rolled[s][w:][~valid] = np.nan
+                blocks.extend(rolled[s] for s in stats)
+
+        features = pd.DataFrame(np.hstack(blocks) if blocks else np.empty((n, 0)),
+                                columns=self.feature_names, index=frame.index)
+        features.insert(0, self.time, frame[self.time].to_numpy())
+        features.insert(0, self.entity, frame[self.entity].to_numpy())
+        return features[frame["_target"].to_numpy()]
+
+    def matrices(self, df, target, history=None, dropna=True):
+        """Named feature matrix X (DataFrame) and target y (Series) aligned on the rows of df."""
+        features = self.transform(df, history)
+        y = df.loc[features.index, target]
+        X = features[self.feature_names]
+        if dropna:
+            keep = X.notna().all(axis=1) & y.notna()
+            X, y = X[keep], y[keep]
+        return X, y
@@ -0,0 +1,266 @@
+import os
+import json
+import glob
+import time
+import random
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+# Country-year panel of World Bank indicators (same result as get_clean_data in import_data_api.ipynb).
+# - requests are split into series x economy x year-range slices and run on a bounded thread pool
+# - every slice is cached on disk (re-runs only download missing slices); slices reaching into the last
+#   RECENT_YEARS years are re-downloaded after recent_ttl seconds, since the World Bank still revises them
+# - the wide panel is built in one reshape at the end
+# Example:
+#   from worldbank_fetch import fetch_panel, INDICATORS
+#   dataset = fetch_panel(INDICATORS, start=1980, end=2020)
+
+API_BASE_URL = "https://api.worldbank.org/v2"
+DEFAULT_CACHE_DIR = os.environ.get("WB_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "worldbank"))
+RETRY_STATUS = {429, 500, 502, 503, 504}
+PER_PAGE = 20000
+RECENT_YEARS = 2  # slices ending in one of the last RECENT_YEARS years are still being revised
+RECENT_TTL = 7 * 24 * 3600  # seconds a cached recent slice is used before it is downloaded again
+
+INDICATORS = [
+    "SL.UEM.TOTL.ZS", "NY.GDP.MKTP.KD.ZG", "NE.CON.PRVT.KD.ZG",
+    "NE.CON.GOVT.KD.ZG", "NE.GDI.TOTL.KD.ZG", "NE.EXP.GNFS.KD.ZG",
+    "NE.IMP.GNFS.KD.ZG", "NV.IND.TOTL.KD.ZG", "NV.SRV.TOTL.KD.ZG",
+    "NV.AGR.TOTL.KD.ZG", "FP.CPI.TOTL.ZG", "NY.GDP.DEFL.KD.ZG",
+    "FR.INR.DPST", "FR.INR.RINR", "FM.LBL.MQMY.GD.ZS", "SL.TLF.CACT.ZS",
+    "SL.EMP.TOTL.SP.ZS", "SP.POP.GROW", "NY.GNS.ICTR.ZS",
+]
+COLUMN_NAMES = {
+    "FP.CPI.TOTL.ZG": "cpi_inflation_pct",
+    "FR.INR.DPST": "deposit_rate_pct",
+    "FR.INR.RINR": "real_interest_rate_pct",
+    "NE.CON.GOVT.KD.ZG": "govt_consumption_growth_pct",
+    "NE.CON.PRVT.KD.ZG": "private_consumption_growth_pct",
+    "NE.EXP.GNFS.KD.ZG": "exports_growth_pct",
+    "NE.GDI.TOTL.KD.ZG": "gross_capital_form_growth_pct",
+    "NE.IMP.GNFS.KD.ZG": "imports_growth_pct",
+    "NV.AGR.TOTL.KD.ZG": "agriculture_growth_pct",
+    "NV.IND.TOTL.KD.ZG": "industry_growth_pct",
+    "NV.SRV.TOTL.KD.ZG": "services_growth_pct",
+    "NY.GDP.DEFL.KD.ZG": "gdp_deflator_inflation_pct",
+    "NY.GDP.MKTP.KD.ZG": "gdp_growth_pct",
+    "NY.GNS.ICTR.ZS": "gross_savings_gdp_pct",
+    "SL.EMP.TOTL.SP.ZS": "employment_ratio_pct",
+    "SL.TLF.CACT.ZS": "labor_force_participation_pct",
+    "SL.UEM.TOTL.ZS": "unemployment_rate_pct",
+    "SP.POP.GROW": "population_growth_pct",
+}
+
+
+def plan_slices(series, economies="all", start=1980, end=2020, years_per_slice=5, economies_per_slice=50):
+    """(series, economy group, first year, last year) for every request; economy groups are ';'-joined ISO3 codes."""
+    if isinstance(economies, str):
+        groups = [economies]
+    else:
+        economies = list(economies)
+        groups = [";".join(economies[i:i + economies_per_slice]) for i in range(0, len(economies), economies_per_slice)]
+    return [
+        (s, group, y, min(y + years_per_slice - 1, end))
+        for s in series
+        for group in groups
+        for y in range(start, end + 1, years_per_slice)
+    ]
+
+
+def _get_json(session, url, params, retries=4, backoff=0.5, timeout=60):
+    # GET with exponential backoff on throttling/server errors and connection problems
+    for attempt in range(retries + 1):
+        try:
+            response = session.get(url, params=params, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == retries:
+                raise
+            time.sleep(backoff * 2 ** attempt + random.uniform(0, backoff))
+            continue
+        if response.status_code in RETRY_STATUS and attempt < retries:
+            time.sleep(backoff * 2 ** attempt + random.uniform(0, backoff))
+            continue
+        response.raise_for_status()
+        return response.json()
+    raise RuntimeError(f"Giving up on {url}")  # not reached
+
+
+def _get_pages(session, url, params, retries):
+    # The API answers [metadata, rows]; follow the pages until all rows are there
+    rows, page = [], 1
+    while True:
+        body = _get_json(session, url, dict(params, page=page), retries)
+        meta = body[0]
+        if "message" in meta:  # API errors come back as [{"message": [...]}]
+            raise ValueError(f"World Bank API error for {url}: {meta['message']}")
+        rows.extend((body[1] if len(body) > 1 else None) or [])
+        if page >= int(meta.get("pages", 1) or 1):
+            return rows
+        page += 1
+
+
+def _slice_path(cache_dir, series, group, first, last):
+    # long economy lists get a stable short name
+    name = group if len(group) <= 40 else hashlib.sha1(group.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir, series, f"{name}_{first}_{last}.json")
+
+
+def _cached(path, max_age):
+    # cache entry exists and is younger than max_age seconds (None: never expires)
+    if not os.path.exists(path):
+        return False
+    return max_age is None or time.time() - os.path.getmtime(path) < max_age
+
+
+def fetch_slice(session, base_url, series, group, first, last, cache_dir, retries=4, max_age=None):
+    """
+    Records [economy, year, value] of one slice, from the disk cache or from the API.
+    - max_age: seconds after which a cached slice is downloaded again (None: cache entries never expire)
+    """
+    path = _slice_path(cache_dir, series, group, first, last)
+    if _cached(path, max_age):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    rows = _get_pages(session, f"{base_url}/country/{group}/indicator/{series}",
+                      {"date": f"{first}:{last}", "format": "json", "per_page": PER_PAGE}, retries)
+    records = [[r["countryiso3code"] or r["country"]["id"], int(r["date"]), r["value"]] for r in rows]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(records, f)
+    os.replace(tmp, path)
+    return records
+
+
+def fetch_economies(session, base_url, cache_dir, retries=4, max_age=None):
+    """ISO3 code -> region name of all economies (aggregates have the region 'Aggregates'), cached."""
+    path = os.path.join(cache_dir, "economies.json")
+    if _cached(path, max_age):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    rows = _get_pages(session, f"{base_url}/country", {"format": "json", "per_page": PER_PAGE}, retries)
+    economies = {r["id"]: r["region"]["value"] for r in rows}
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(economies, f)
+    return economies
+
+
+def fetch_panel(series=INDICATORS, economies="all", start=1980, end=2020, years_per_slice=5,
+                max_workers=8, base_url=API_BASE_URL, cache_dir=DEFAULT_CACHE_DIR, skip_aggregates=True,
+                retries=4, column_names=COLUMN_NAMES, refresh=False, recent_ttl=RECENT_TTL):
+    """
+    Wide country-year panel: one row per (years, economy), one column per series (renamed with column_names).
+    - slices run concurrently on max_workers threads over one pooled session, failed requests are retried
+    - skip_aggregates drops regions/income groups (like wbgapi's skipAggs=True)
+    - base_url: point to a local stand-in (serve_recorded_api) to run without the real API
+    - refresh: download every slice (and the economy list) again instead of using the cache
+    - recent_ttl: cache lifetime in seconds of slices reaching into the last RECENT_YEARS years
+      (None: keep them like older slices)
+    """
+    recent = pd.Timestamp.today().year - RECENT_YEARS + 1
+
+    def max_age(last):
+        if refresh:
+            return 0
+        return recent_ttl if last >= recent else None
+
+    slices = plan_slices(series, economies, start, end, years_per_slice)
+    parts = []
+    with requests.Session() as session:
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {
+                pool.submit(fetch_slice, session, base_url, s, group, first, last, cache_dir, retries,
+                            max_age(last)): s
+                for s, group, first, last in slices
+            }
+            for future in as_completed(futures):
+                records = future.result()
+                if records:
+                    part = pd.DataFrame(records, columns=["economy", "year", "value"])
+                    part["series"] = futures[future]
+                    parts.append(part)
+        print(f"[worldbank] {len(slices)} slices, {sum(len(p) for p in parts)} records")
+
+        if not parts:
+            return pd.DataFrame(columns=["years", "economy"])
+        long = pd.concat(parts, ignore_index=True).dropna(subset=["value"])
+        if skip_aggregates:
+            regions = fetch_economies(session, base_url, cache_dir, retries, 0 if refresh else None)
+            long = long[long["economy"].map(regions).ne("Aggregates")]
+
+    # One reshape for the whole panel (instead of melt + pivot_table per time slice)
+    long["value"] = long["value"].astype(float)
+    panel = (
+        long.pivot_table(values="value", index=["year", "economy"], columns="series", aggfunc="first")
+        .rename(columns=column_names)
+        .reset_index()
+    )
+    panel.columns.name = None
+    panel.insert(0, "years", pd.to_datetime(panel.pop("year").astype(str), format="%Y"))
+    return panel
+
+
+def serve_recorded_api(cache_dir, port=0, error_rate=0.0):
+    """
+    Local stand-in for api.worldbank.org/v2 that answers from a recorded slice cache (cache_dir of an
+    earlier fetch_panel run): /v2/country/<economies>/indicator/<series>?date=a:b&page=n and /v2/country.
+    error_rate: share of requests answered with 503 (exercises the retry path).
+    Returns the running server; use f"http://127.0.0.1:{server.server_port}/v2" as base_url.
+    """
+    records = {}
+    for path in glob.glob(os.path.join(cache_dir, "*", "*.json")):
+        with open(path, "r", encoding="utf-8") as f:
+            records.setdefault(os.path.basename(os.path.dirname(path)), set()).update(map(tuple, json.load(f)))
+    with open(os.path.join(cache_dir, "economies.json"), "r", encoding="utf-8") as f:
+        economies = json.load(f)
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body):
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if random.random() < error_rate:
+                return self._send(503, {"message": "try again"})
+            url = urlsplit(self.path)
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            parts = url.path.strip("/").split("/")  # v2/country[/<economies>/indicator/<series>]
+            page, per_page = int(query.get("page", 1)), int(query.get("per_page", 50))
+            if parts[1:] == ["country"]:
+                rows = [{"id": code, "region": {"value": region}} for code, region in sorted(economies.items())]
+            elif len(parts) == 5 and parts[1] == "country" and parts[3] == "indicator":
+                first, _, last = query.get("date", "1900:2100").partition(":")
+                wanted = None if parts[2].lower() == "all" else set(parts[2].split(";"))
+                rows = [
+                    {"indicator": {"id": parts[4]}, "country": {"id": econ}, "countryiso3code": econ,
+                     "date": str(year), "value": value}
+                    for econ, year, value in sorted(records.get(parts[4], ()), key=lambda r: (r[0], -r[1]))
+                    if int(first) <= year <= int(last or first) and (wanted is None or econ in wanted)
+                ]
+            else:
+                return self._send(404, [{"message": [{"value": "unknown path"}]}])
+            pages = max(1, -(-len(rows) // per_page))
+            meta = {"page": page, "pages": pages, "per_page": per_page, "total": len(rows)}
+            self._send(200, [meta, rows[(page - 1) * per_page: page * per_page]])
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
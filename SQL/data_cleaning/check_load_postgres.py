@@ -0,0 +1,78 @@
+import os
+import sys
+import tempfile
+import psycopg
+from psycopg import sql
+from world_bank_cleaning import clean_world_bank_export
+from load_postgres import CONNINFO, load_world_bank_export, load_cleaned_csv
+
+# End-to-end check of the PostgreSQL loader against a local server (no World Bank download needed):
+# a small Latin-1 export with countries, aggregates (regions, income groups, IDA, ...), '..' values
+# and footer lines is loaded with both load_world_bank_export and load_cleaned_csv into scratch
+# objects (<table>_check, <view>_check, dropped afterwards) and the row counts are compared.
+# Example:
+#   WB_PG_CONNINFO=postgresql://postgres@localhost:5432/postgres python check_load_postgres.py
+
+TABLE = "international_debt_check"
+VIEW = "debt_indicators_check"
+HEADER = ["Country Name", "Country Code", "Counterpart-Area Name", "Counterpart-Area Code",
+          "Series Name", "Series Code", "2019 [YR2019]", "2023 [YR2023]"]
+SERIES = [("External debt stocks, total (DOD, current US$)", "DT.DOD.DECT.CD"),
+          ("External debt stocks (% of GNI)", "DT.DOD.DECT.GN.ZS")]
+COUNTRIES = [("Chile", "CHL"), ("Côte d'Ivoire", "CIV"), ("Korea, Rep.", "KOR"), ("Mongolia", "MNG")]
+AGGREGATES = [("Latin America & Caribbean", "LAC"), ("Low income", "LIC"), ("IDA only", "IDX"),
+              ("East Asia & Pacific", "EAP"), ("Least developed countries: UN classification", "LDC")]
+YEARS = 2
+
+
+def _quote(field):
+    return '"' + field.replace('"', '""') + '"' if "," in field or '"' in field else field
+
+
+def write_fixture(path):
+    """Export-like CSV (ISO-8859-1); returns the number of long rows expected in the table."""
+    lines = [",".join(HEADER)]
+    for name, code in COUNTRIES + AGGREGATES:
+        for i, (series_name, series_code) in enumerate(SERIES):
+            fields = [name, code, "World", "WLD", series_name, series_code, str(100 + i), str(90 + i)]
+            lines.append(",".join(map(_quote, fields)))
+    # incomplete row ('..') and DataBank footer lines are dropped by the cleaner
+    lines.append(",".join(["Chile", "CHL", "World", "WLD", "Debt service", "DT.TDS.DECT.CD", "..", "5"]))
+    lines += ["", "Data from database: International Debt Statistics", "Last Updated: 12/03/2024"]
+    with open(path, "w", encoding="ISO-8859-1", newline="") as f:
+        f.write("\n".join(lines) + "\n")
+    return len(COUNTRIES) * len(SERIES) * YEARS
+
+
+def _counts(conn):
+    table, view = sql.Identifier(TABLE), sql.Identifier(VIEW)
+    rows = conn.execute(sql.SQL("SELECT count(*) FROM {}").format(table)).fetchone()[0]
+    names = {r[0] for r in conn.execute(sql.SQL("SELECT DISTINCT country_name FROM {}").format(table))}
+    view_rows = conn.execute(sql.SQL("SELECT count(*) FROM {}").format(view)).fetchone()[0]
+    return rows, names, view_rows
+
+
+def check_loader(conninfo=CONNINFO):
+    folder = tempfile.mkdtemp()
+    export = os.path.join(folder, "international_debt.csv")
+    expected = write_fixture(export)
+    expected_names = {name for name, _ in COUNTRIES}
+    cleaned = os.path.join(folder, "international_debt_cleaned.csv")
+    clean_world_bank_export(export, cleaned, chunksize=5, strip_commas=False)
+    try:
+        for loader, source in ((load_world_bank_export, export), (load_cleaned_csv, cleaned)):
+            loaded = loader(source, conninfo, table=TABLE, indicator_view=VIEW)
+            with psycopg.connect(conninfo) as conn:
+                rows, names, view_rows = _counts(conn)
+            assert loaded == rows == expected, (loader.__name__, loaded, rows, expected)
+            assert names == expected_names, (loader.__name__, names)
+            assert view_rows == len(COUNTRIES) * YEARS, (loader.__name__, view_rows)
+            print(f"{loader.__name__}: {rows} rows, {view_rows} indicator rows, no aggregates - ok")
+    finally:
+        with psycopg.connect(conninfo) as conn:
+            conn.execute(sql.SQL("DROP MATERIALIZED VIEW IF EXISTS {}").format(sql.Identifier(VIEW)))
+            conn.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(sql.Identifier(TABLE)))
+
+
+if __name__ == "__main__":
+    check_loader(sys.argv[1] if len(sys.argv) > 1 else CONNINFO)
@@ -1,52 +1,102 @@
+import re
+import os
+import codecs
 import pandas as pd
-import chardet
-import numpy as np
-
-# Check what encoding the file has to read it in
-with open(r'C:\Users\Niklas\Desktop\P_Data_Extract_From_International_Debt_Statistics\international_debt.csv', "rb") as f:
-    rawdata = f.read(10000)
-    result = chardet.detect(rawdata)
-    print(result)
-# Read it in clean whitespaces, insert NA for '..'
-pd.set_option("display.max_columns", 15)
-df = pd.read_csv(r'C:\Users\Niklas\Desktop\P_Data_Extract_From_International_Debt_Statistics\international_debt.csv', encoding='ISO-8859-1')
-print(df.head(10))
-for col in df.select_dtypes(include='object'):
-    df[col] = df[col].str.strip()
-df.replace('..',   pd.NA , inplace=True)
-# Look after different specified missing values
-print(df.isna().sum())
-print(df.isna())
-print(df.tail(5))
-# All unnecessary columns therefore drop
-df.dropna(inplace = True)
-print(df.isna().sum())
-# Rename columns
-df.columns = [
-    "country_name",
-    "country_code",
-    "counterpart_area_name",
-    "counterpart_area_code",
-    "series_name",
-    "series_code",
-    "2019",
-    "2020",
-    "2021",
-    "2022",
-    "2023"
-]
-# Strip out any comma in the files, PostgreSQL has still problems to assessing the right columns with
-df["series_name"] = df["series_name"].str.replace(',', '', regex=False)
-df["counterpart_area_name"] = df["counterpart_area_name"].str.replace(',', '', regex=False)
-df["country_name"] = df["country_name"].str.replace(',', '', regex=False)
-
-# Convert into long format years and values (also helps with the NaN columns directly deletes it)
-print(df.dtypes)
-id_col = ["country_name","country_code","counterpart_area_name","counterpart_area_code","series_name","series_code"]
-values = ["2019","2020","2021","2022", "2023"]
-df = df.melt(id_vars = id_col ,value_vars = values, var_name= "year", value_name = "value")
-print(df.head())
-
-# Export the file and convert to utf-8
-df.to_csv(r'C:\Users\Niklas\Desktop\P_Data_Extract_From_International_Debt_Statistics\international_debt_cleaned.csv', index=False, encoding='utf-8')
 
+# Clean the International Debt Statistics export for the PostgreSQL import (long format, UTF-8).
+# The file is streamed in chunks, so memory stays flat no matter how many years/rows the export has:
+#   encoding (ISO-8859-1 as exported, or encoding="auto") -> per chunk: strip whitespace / '..' -> NA / commas in one pass,
+#   drop incomplete rows, melt the year columns -> append to the output CSV
+INPUT_PATH = r'C:\Users\Niklas\Desktop\P_Data_Extract_From_International_Debt_Statistics\international_debt.csv'
+OUTPUT_PATH = r'C:\Users\Niklas\Desktop\P_Data_Extract_From_International_Debt_Statistics\international_debt_cleaned.csv'
+
+ID_COLUMNS = ["country_name", "country_code", "counterpart_area_name", "counterpart_area_code",
+              "series_name", "series_code"]
+# Text columns that may contain commas (PostgreSQL CSV import had problems assessing the right columns)
+NAME_COLUMNS = ["series_name", "counterpart_area_name", "country_name"]
+MISSING = ".."  # World Bank marker for missing values
+DEFAULT_ENCODING = "ISO-8859-1"  # encoding of the World Bank DataBank exports
+
+
+def detect_encoding(path, block_size=1 << 20):
+    """
+    Encoding of the export, checked on the whole file (accented names such as "Côte d'Ivoire" may only
+    appear far into it): UTF-8 if every byte decodes as UTF-8, else ISO-8859-1 (decodes any byte).
+    """
+    with open(path, "rb") as f:
+        head = f.read(3)
+        encoding = "utf-8-sig" if head == b"\xef\xbb\xbf" else "utf-8"
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        try:
+            decoder.decode(head if encoding == "utf-8" else b"")
+            for block in iter(lambda: f.read(block_size), b""):
+                decoder.decode(block)
+            decoder.decode(b"", final=True)
+        except UnicodeDecodeError:
+            return DEFAULT_ENCODING
+    return encoding
+
+
+def year_columns(columns):
+    """Export year headers ('2019 [YR2019]' or '2019') -> '2019', for any number of years."""
+    mapping = {}
+    for col in columns[len(ID_COLUMNS):]:
+        match = re.match(r"\s*(\d{4})", str(col))
+        if match:
+            mapping[col] = match.group(1)
+    return mapping
+
+
+def clean_chunk(chunk, years, strip_commas=True):
+    """
+    One pass per text column: surrounding whitespace (and commas in the name columns) removed,
+    '..' and empty cells -> NA. Rows with any missing value are dropped (as before), then the
+    year columns are melted to (year, value).
+    """
+    chunk = chunk.iloc[:, :len(ID_COLUMNS)].set_axis(ID_COLUMNS, axis=1).join(
+        chunk[list(years)].rename(columns=years)
+    )
+    for col in chunk.columns:
+        pattern = r"^\s+|\s+$|," if strip_commas and col in NAME_COLUMNS else r"^\s+|\s+$"
+        cleaned = chunk[col].str.replace(pattern, "", regex=True)
+        chunk[col] = cleaned.mask(cleaned.isin([MISSING, ""]))
+    chunk = chunk.dropna()
+    return chunk.melt(id_vars=ID_COLUMNS, value_vars=list(years.values()), var_name="year", value_name="value")
+
+
+def iter_cleaned_chunks(input_path, chunksize=100_000, strip_commas=True, encoding=None):
+    """
+    Long-format DataFrames (ID_COLUMNS + year, value), one per chunk of `chunksize` export rows.
+    encoding: None = ISO-8859-1 (World Bank export), "auto" = detect_encoding (full-file check).
+    """
+    encoding = encoding or DEFAULT_ENCODING
+    if encoding == "auto":
+        encoding = detect_encoding(input_path)
+    reader = pd.read_csv(input_path, encoding=encoding, dtype=str, keep_default_na=False,
+                         na_values=["", MISSING], chunksize=chunksize)
+    years = None
+    for chunk in reader:
+        if years is None:
+            years = year_columns(chunk.columns)
+        yield clean_chunk(chunk, years, strip_commas=strip_commas)
+
+
+def clean_world_bank_export(input_path, output_path, chunksize=100_000, strip_commas=True, encoding=None):
+    """
+    Stream the export in chunks of `chunksize` rows and append the long-format rows to output_path (UTF-8).
+    strip_commas=False keeps the names intact (values are quoted; load_postgres.py needs no stripping).
+    Returns the number of rows written.
+    """
+    written = 0
+    tmp = output_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8", newline="") as out:
+        for i, long in enumerate(iter_cleaned_chunks(input_path, chunksize, strip_commas, encoding)):
+            long.to_csv(out, index=False, header=(i == 0))
+            written += len(long)
+    os.replace(tmp, output_path)
+    print(f"{written} rows written to {output_path}")
+    return written
+
+
+if __name__ == "__main__":
+    clean_world_bank_export(INPUT_PATH, OUTPUT_PATH)
@@ -22,3 +22,10 @@ WHERE country_name IS NULL
    OR country_name ILIKE 'IDA%'
    OR country_name ILIKE '%Asia%'
    OR country_name ILIKE 'Least developed%';
+-- Refresh debt_indicators after this DELETE (REFRESH MATERIALIZED VIEW debt_indicators), see debt_indicators.sql
+
+-- Index for the access pattern of the analysis queries (filter on series_code and year, group by country)
+-- (load_postgres.py creates it automatically after the COPY load)
+CREATE INDEX IF NOT EXISTS international_debt_series_year_country_idx
+    ON international_debt (series_code, year, country_name);
+ANALYZE international_debt;
@@ -0,0 +1,29 @@
+-- Wide per-country-per-year table of the debt indicators used in advanced_analysis.sql
+-- (pivoted once instead of MAX/SUM(CASE WHEN series_code = ...) in every query)
+-- Amounts are summed over the counterpart areas, ratios take the maximum - same as the original queries
+-- (debt_gni_ratio_avg: average ratio, the filter of Query 2)
+-- Order: import -> aggregate DELETE of creation_table_cleaning.sql -> this view. The view is a snapshot,
+-- so it has to be refreshed after every change of international_debt (import or cleanup), see below
+CREATE MATERIALIZED VIEW IF NOT EXISTS debt_indicators AS
+SELECT country_name,
+       year,
+       SUM(value) FILTER (WHERE series_code = 'DT.DOD.DECT.CD')    AS total_debt,
+       MAX(value) FILTER (WHERE series_code = 'DT.DOD.DECT.GN.ZS') AS debt_gni_ratio,
+       AVG(value) FILTER (WHERE series_code = 'DT.DOD.DECT.GN.ZS') AS debt_gni_ratio_avg,
+       MAX(value) FILTER (WHERE series_code = 'DT.DOD.DECT.PC.CD') AS debt_per_capita,
+       SUM(value) FILTER (WHERE series_code = 'DT.DOD.DSTC.CD')    AS short_term_debt,
+       SUM(value) FILTER (WHERE series_code = 'DT.DOD.DPPG.CD')    AS public_debt,
+       SUM(value) FILTER (WHERE series_code = 'DT.DOD.DPNG.CD')    AS private_debt
+FROM international_debt
+WHERE series_code IN ('DT.DOD.DECT.CD', 'DT.DOD.DECT.GN.ZS', 'DT.DOD.DECT.PC.CD',
+                      'DT.DOD.DSTC.CD', 'DT.DOD.DPPG.CD', 'DT.DOD.DPNG.CD')
+GROUP BY country_name, year;
+
+-- One row per country and year (the unique index also allows REFRESH ... CONCURRENTLY)
+CREATE UNIQUE INDEX IF NOT EXISTS debt_indicators_country_year_idx ON debt_indicators (country_name, year);
+CREATE INDEX IF NOT EXISTS debt_indicators_year_idx ON debt_indicators (year);
+
+-- Refresh after new data was imported into international_debt AND the aggregates were deleted
+-- (load_postgres.py does this automatically after the COPY load and the DELETE)
+REFRESH MATERIALIZED VIEW CONCURRENTLY debt_indicators;
+ANALYZE debt_indicators;